@@ -0,0 +1,105 @@
+import math
+
+INFINITE_COST = 10 ** 9  # Stand-in for a box that cannot reach a goal, keeps the arithmetic finite
+
+
+class Assignment:
+    # Minimum cost assignment of boxes (rows) to goals (columns) together with its dual values.
+    # A push moves a single box, so a child's cost matrix differs from its parent's in one row.
+    # repair() reuses the parent's matching and duals and only runs one augmenting path for that
+    # row (O(n^2)) instead of a full Hungarian solve (O(n^3)).
+    # Arrays are 1-based like the classic shortest augmenting path formulation: u/v are the row
+    # and column duals, match[j] is the row assigned to column j (0 = free)
+    __slots__ = ("cells", "rows", "u", "v", "match")
+
+    def __init__(self, cells, rows, u, v, match):
+        self.cells = cells
+        self.rows = rows
+        self.u = u
+        self.v = v
+        self.match = match
+
+    @classmethod
+    def solve(cls, cells, rows):
+        # Full solve: start from zero duals and augment every row in turn
+        num_goals = len(rows[0]) if rows else 0
+        if len(rows) > num_goals:
+            # Every row needs its own column, the augmenting path search would never end
+            raise ValueError(f"Cannot assign {len(rows)} boxes to {num_goals} goals")
+        assignment = cls(list(cells), list(rows), [0] * (len(rows) + 1), [0] * (num_goals + 1),
+                         [0] * (num_goals + 1))
+        for i in range(1, len(rows) + 1):
+            assignment._augment(i)
+        return assignment
+
+    def repair(self, old_cell, new_cell, new_row):
+        # Matching for the same boxes after the box at old_cell moved to new_cell
+        row = self.cells.index(old_cell)
+        if len(self.rows) != len(self.v) - 1:
+            # With more goals than boxes the freed goal's dual would have to return to zero,
+            # which the single-row update cannot guarantee, so solve from scratch
+            cells = self.cells.copy()
+            rows = self.rows.copy()
+            cells[row] = new_cell
+            rows[row] = new_row
+            return Assignment.solve(cells, rows)
+        assignment = Assignment(self.cells.copy(), self.rows.copy(), self.u.copy(), self.v.copy(),
+                                self.match.copy())
+        assignment.cells[row] = new_cell
+        assignment.rows[row] = new_row
+
+        # Free the changed row and lower its dual so every reduced cost of the row is >= 0 again.
+        # All other rows keep a feasible, tight matching, so one augmenting path restores optimality
+        i = row + 1
+        match = assignment.match
+        v = assignment.v
+        match[match.index(i, 1)] = 0
+        assignment.u[i] = min(new_row[j - 1] - v[j] for j in range(1, len(v)))
+        assignment._augment(i)
+        return assignment
+
+    def _augment(self, i):
+        # Dijkstra-like search for the cheapest augmenting path from free row i, updating the duals
+        rows, u, v, match = self.rows, self.u, self.v, self.match
+        num_goals = len(v) - 1
+        min_slack = [math.inf] * (num_goals + 1)
+        way = [0] * (num_goals + 1)
+        used = [False] * (num_goals + 1)
+
+        match[0] = i
+        j0 = 0
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            row = rows[i0 - 1]
+            u0 = u[i0]
+            delta = math.inf
+            j1 = 0
+            for j in range(1, num_goals + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u0 - v[j]
+                    if cur < min_slack[j]:
+                        min_slack[j] = cur
+                        way[j] = j0
+                    if min_slack[j] < delta:
+                        delta = min_slack[j]
+                        j1 = j
+            for j in range(num_goals + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+
+        # Flip the matching along the path back to the free row
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+
+    def costs(self):
+        # Cost of every assigned box-goal pair
+        return [self.rows[i - 1][j - 1] for j, i in enumerate(self.match) if j and i]
@@ -0,0 +1,135 @@
+from sokoban_state import SokobanState, StaticBoard
+
+
+class BitboardState(SokobanState):
+    # Alternative state backend: cells are numbered 0..W*H-1 and the boxes are a single int bitmask,
+    # so pushes, goal tests, dead square checks and hashing are all integer operations.
+    # It keeps the SokobanState interface (player/boxes as coordinates, the same method signatures)
+    # for the GUI and the solvers, so the inherited push/pull generators work unchanged.
+    # _player and _boxes cache the coordinates: the player cell is stored with the index, the box
+    # set is decoded on first access (the heuristic and the freeze checks read it often) and a
+    # plain step shares the parent's, since only pushes change it
+    __slots__ = ("player_index", "box_mask", "_player", "_boxes")
+
+    def __init__(self, grid, heuristic_type="push", deadlock_table=None):
+        self.board = StaticBoard(grid, heuristic_type, deadlock_table)
+        self.player_index = self.board.index(*self.board.start_player)
+        self.box_mask = self.board.to_mask(self.board.start_boxes)
+        self.hash_key = self.board.zobrist(self.board.start_player, self.board.start_boxes)
+        self.matching = None
+        self._player = self.board.start_player
+        self._boxes = self.board.start_boxes
+
+    @classmethod
+    def from_parts(cls, board, player, boxes):
+        boxes = frozenset(boxes)
+        return cls._from_index(board, board.index(*player), board.to_mask(boxes), board.zobrist(player, boxes),
+                               None, boxes)
+
+    @classmethod
+    def from_state(cls, state):
+        board = state.board
+        return cls._from_index(board, board.index(*state.player), board.to_mask(state.boxes),
+                               state.hash_key, state.matching, state.boxes)
+
+    @classmethod
+    def from_key(cls, board, player_index, box_mask):
+        # Straight from a (player cell index, box mask) key, without building coordinates
+        hash_key = board.zobrist_player[player_index]
+        zobrist_box = board.zobrist_box
+        mask = box_mask
+        while mask:
+            low = mask & -mask
+            hash_key ^= zobrist_box[low.bit_length() - 1]
+            mask ^= low
+        return cls._from_index(board, player_index, box_mask, hash_key)
+
+    @classmethod
+    def _from_index(cls, board, player_index, box_mask, hash_key, matching=None, boxes=None):
+        new_state = object.__new__(cls)
+        new_state.board = board
+        new_state.player_index = player_index
+        new_state.box_mask = box_mask
+        new_state.hash_key = hash_key
+        new_state.matching = matching
+        new_state._player = board.cells[player_index]
+        new_state._boxes = boxes
+        return new_state
+
+    def __reduce__(self):
+        # The coordinate properties have no setters, so rebuild from the key (e.g. for worker processes)
+        return type(self).from_key, (self.board, self.player_index, self.box_mask)
+
+    def _make(self, player, boxes, hash_key, matching=None):
+        # Same signature as SokobanState._make, used by the inherited push/pull generators
+        board = self.board
+        return self._from_index(board, board.index(*player), board.to_mask(boxes), hash_key, matching, boxes)
+
+    @property
+    def player(self):
+        return self._player
+
+    @property
+    def boxes(self):
+        boxes = self._boxes
+        if boxes is None:
+            boxes = self._boxes = self.board.from_mask(self.box_mask)
+        return boxes
+
+    def is_goal(self):
+        return self.box_mask == self.board.goal_mask
+
+    def has_box(self, cell):
+        x, y = cell
+        return bool(self.box_mask >> self.board.index(x, y) & 1)
+
+    def is_deadlocked(self, box=None):
+        # Dead square test on the mask bit of the moved box, then the shared freeze and pattern checks
+        if box is None:
+            return super().is_deadlocked()
+        board = self.board
+        if board.dead_mask >> board.index(*box) & 1:
+            return True
+        return super().is_deadlocked(box)
+
+    def clone(self):
+        return self._from_index(self.board, self.player_index, self.box_mask, self.hash_key, self.matching,
+                                self._boxes)
+
+    def get_successors(self, skip_deadlock_check=False):
+        successors = []
+        box_mask = self.box_mask
+        board = self.board
+        zobrist_player = board.zobrist_player
+        zobrist_box = board.zobrist_box
+        base_key = self.hash_key ^ zobrist_player[self.player_index]
+        boxes = self._boxes
+        cells = board.cells
+
+        for direction, adjacent, beyond in board.index_neighbors[self.player_index]:
+            key = base_key ^ zobrist_player[adjacent]
+
+            # Move in an empty/goal direction
+            if not box_mask >> adjacent & 1:
+                successors.append((direction, self._from_index(board, adjacent, box_mask, key, self.matching, boxes)))
+
+            # Move in box direction, the tile beyond the box must be free
+            elif beyond >= 0 and not box_mask >> beyond & 1:
+                key ^= zobrist_box[adjacent] ^ zobrist_box[beyond]
+                new_state = self._from_index(board, adjacent, box_mask ^ (1 << adjacent | 1 << beyond), key,
+                                             self.pushed_matching(cells[adjacent], cells[beyond]))
+                if skip_deadlock_check or not new_state.is_deadlocked(cells[beyond]):
+                    successors.append((direction, new_state))
+
+        return successors
+
+    def __lt__(self, other):
+        return (self.player_index, self.box_mask) < (other.player_index, other.box_mask)
+
+    def __hash__(self):
+        return self.hash_key
+
+    def __eq__(self, other):
+        return (self.hash_key == other.hash_key and
+                self.player_index == other.player_index and
+                self.box_mask == other.box_mask)
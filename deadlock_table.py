@@ -0,0 +1,115 @@
+import json
+import os
+from sokoban_state import SokobanState
+
+DEADLOCK_TABLE_PATH = "deadlock_patterns.json"
+WINDOW = [(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)]  # 3x3 window around the moved box
+MAX_PROOF_NODES = 2000
+
+
+class DeadlockTable:
+    # Learned box patterns that are proven dead, keyed per level by a compact code:
+    # the cell index of the moved box followed by 9 bits marking the boxes in the 3x3 window
+    # around it. Walls and goals are fixed per level, so the code alone identifies the pattern.
+    # Unknown patterns are settled once by a bounded sub-search and remembered either way;
+    # the table can be saved so later runs on the same levels start warm
+    def __init__(self, path=DEADLOCK_TABLE_PATH):
+        self.path = path
+        self.levels = {}  # board.layout_key -> {code: True if dead, False if not proven dead}
+        self.lookups = 0
+        self.proofs = 0
+
+    @classmethod
+    def load(cls, path=DEADLOCK_TABLE_PATH):
+        table = cls(path)
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            for level_key, patterns in data.items():
+                known = table.levels.setdefault(level_key, {})
+                known.update((code, True) for code in patterns["dead"])
+                known.update((code, False) for code in patterns["alive"])
+        return table
+
+    def save(self):
+        data = {
+            level_key: {
+                "dead": [code for code, dead in patterns.items() if dead],
+                "alive": [code for code, dead in patterns.items() if not dead],
+            }
+            for level_key, patterns in self.levels.items()
+        }
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+
+    def merge(self, levels):
+        # Add patterns learned by another copy of the table, e.g. in a solver worker process
+        for level_key, patterns in levels.items():
+            self.levels.setdefault(level_key, {}).update(patterns)
+
+    def pattern(self, state, box):
+        # (code, boxes inside the window) for the window centred on box
+        board = state.board
+        x, y = box
+        bits = 0
+        window_boxes = []
+        for k, (dx, dy) in enumerate(WINDOW):
+            cell = (x + dx, y + dy)
+            if state.has_box(cell):
+                bits |= 1 << k
+                window_boxes.append(cell)
+        return board.index(x, y) << len(WINDOW) | bits, window_boxes
+
+    def is_dead(self, state, box):
+        board = state.board
+        code, window_boxes = self.pattern(state, box)
+
+        # A single box is already covered by the dead squares, and boxes that all sit on goals are fine
+        if len(window_boxes) < 2 or all(cell in board.goals for cell in window_boxes):
+            return False
+
+        self.lookups += 1
+        known = self.levels.setdefault(board.layout_key, {})
+        dead = known.get(code)
+        if dead is None:
+            self.proofs += 1
+            dead = self.prove_dead(state, box, window_boxes)
+            known[code] = dead
+        return dead
+
+    def prove_dead(self, state, box, window_boxes):
+        # Bounded push search with only the window's boxes on the board, tried from every area the
+        # player could be standing in. Removing boxes never makes a level harder, and any solution
+        # would have to either get all of these boxes onto goals or push one out of the window.
+        # If neither happens anywhere within the budget the pattern is dead for any player position
+        board = state.board
+        boxes = frozenset(window_boxes)
+        x, y = box
+        window = {(x + dx, y + dy) for dx, dy in WINDOW}
+
+        visited = set()
+        for cell in board.floor:
+            if cell in boxes or cell in visited:
+                continue
+            start = SokobanState.from_parts(board, cell, boxes)
+            region = start.reachable()
+            visited.update(region)
+
+            frontier = [start]
+            seen = {(min(region), boxes)}
+            for current in frontier:
+                if len(seen) > MAX_PROOF_NODES:
+                    return False  # Out of budget, not proven
+                if current.boxes <= board.goals:
+                    return False
+                for _, successor in current.get_push_successors(skip_deadlock_check=True):
+                    moved = next(iter(successor.boxes - current.boxes))
+                    if moved in board.dead_squares:
+                        continue
+                    if moved not in window:
+                        return False  # The cluster can be broken up
+                    key = (min(successor.reachable()), successor.boxes)
+                    if key not in seen:
+                        seen.add(key)
+                        frontier.append(successor)
+        return True
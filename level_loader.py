@@ -28,18 +28,27 @@ def apply_solution(state, solution):
     return current_state
 
 def run_solver(name, solver_func, initial_state):
-    print(f"--- {name} ---")
     path, stats = solver_func(initial_state)
+    print_solver_result(name, path, stats, initial_state)
+    return path, stats
+
+def print_solver_result(name, path, stats, initial_state):
+    print(f"--- {name} ---")
     if path:
         print(f"{name} Solution: {path}")
         final_state = apply_solution(initial_state, path)
         print(f"Final {name} State:")
         print(final_state)
         print(f"{name} Stats: Time = {stats['execution_time']:.4f}s, Explored Nodes = {stats['explored_nodes']}, Steps: {len(path)}")
+        if "cache_hits" in stats:
+            print(f"{name} {'from cache' if stats.get('cached') else 'solved'}, Cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses")
 
+    elif stats.get("timed_out"):
+        print(f"{name} timed out after {stats['execution_time']:.1f}s, no solution.")
+    elif "exit_code" in stats:
+        print(f"{name} exited with code {stats['exit_code']} before reporting.")
     else:
         print(f"No {name} solution found.")
         print(f"{name} Stats: Time = {stats['execution_time']:.4f}s, Explored Nodes = {stats['explored_nodes']}")
 
     print()
-    return path, stats
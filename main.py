@@ -3,55 +3,71 @@ from solvers.astar_solver import astar_solver
 from solvers.bfs_solver import bfs_solver
 from solvers.dfs_solver import dfs_solver
 from level_loader import load_level
-from level_loader import run_solver
+from level_loader import print_solver_result
 from visualize import run_game
 from menu import run_menu
 from solo_game import run_solo_game
+from deadlock_table import DeadlockTable
+from portfolio import Portfolio
+from solution_cache import SolutionCache
 
-level = load_level("levels/level1.txt")
-choice, path, theme = run_menu()
-print(theme)
-if theme is None:
-    theme = "blue"
-
-if choice is None:
-    print("User quit the menu")
-    exit(0)
-if path is not None:
-    level = load_level(path)
-
-initial_state = SokobanState(level)
-initial_state.print_dead_squares()
-
-while True:
-    if choice == "solo":
-        result = run_solo_game(initial_state, astar_solver, theme)
-        if result is None:
-            break
-        choice, path, theme = run_menu()
-        if path is not None:
-            level = load_level(path)
-        initial_state = SokobanState(level)
-        initial_state.print_dead_squares()
-
-    elif choice == "ai":
-        astar_solution, astar_stats = run_solver("A*", astar_solver, initial_state)
-        bfs_solution, bfs_stats = run_solver("BFS", bfs_solver, initial_state)
-        dfs_solution, dfs_stats = run_solver("DFS", dfs_solver, initial_state)
-        result = run_game(initial_state, astar_solution, astar_stats, bfs_solution, bfs_stats, dfs_solution, dfs_stats, theme)
-        if result is None:
+SOLVER_TIMEOUT = 120  # Seconds each AI solver may run before it is stopped
+
+# The guard keeps solver worker processes that re-import this module from opening the menu
+if __name__ == "__main__":
+    level = load_level("levels/level1.txt")
+    deadlock_table = DeadlockTable.load()  # Learned deadlock patterns from earlier runs
+    solution_cache = SolutionCache()  # Solutions from earlier runs, reused instead of solving again
+    choice, path, theme = run_menu()
+    print(theme)
+    if theme is None:
+        theme = "blue"
+
+    if choice is None:
+        print("User quit the menu")
+        exit(0)
+    if path is not None:
+        level = load_level(path)
+
+    initial_state = SokobanState(level, deadlock_table=deadlock_table)
+    initial_state.print_dead_squares()
+
+    while True:
+        if choice == "solo":
+            result = run_solo_game(initial_state, astar_solver, theme)
+            if result is None:
+                break
+            choice, path, theme = run_menu()
+            if path is not None:
+                level = load_level(path)
+            initial_state = SokobanState(level, deadlock_table=deadlock_table)
+            initial_state.print_dead_squares()
+
+        elif choice == "ai":
+            # All three solvers run in parallel, the visualization starts right away and picks up each
+            # solution as it arrives. Solvers with a cached solution for this level are not run again
+            portfolio = Portfolio(initial_state, {"A*": astar_solver, "BFS": bfs_solver, "DFS": dfs_solver},
+                                  timeouts=SOLVER_TIMEOUT, cache=solution_cache,
+                                  on_result=lambda name, path, stats: print_solver_result(name, path, stats, initial_state))
+            portfolio.start()
+            result = run_game(initial_state, theme=theme, portfolio=portfolio)
+            portfolio.stop()
+            if result is None:
+                break
+            choice, path, theme = run_menu()
+            if path is not None:
+                level = load_level(path)
+            initial_state = SokobanState(level, deadlock_table=deadlock_table)
+            initial_state.print_dead_squares()
+
+        elif choice == "settings":
+            choice, path, theme = run_menu()
+            if path is not None:
+                level = load_level(path)
+            initial_state = SokobanState(level, deadlock_table=deadlock_table)
+
+        elif choice == "quit":
             break
-        choice, path, theme = run_menu()
-        if path is not None:
-            level = load_level(path)
-        initial_state = SokobanState(level)
-        initial_state.print_dead_squares()
-
-    elif choice == "settings":
-        choice, path, theme = run_menu()
-        if path is not None:
-            level = load_level(path)
-        initial_state = SokobanState(level)
-
-    elif choice == "quit":
-        break
+
+    deadlock_table.save()
+    solution_cache.close()
@@ -0,0 +1,122 @@
+import multiprocessing
+import queue
+import time
+
+
+def _run_solver(name, solver_func, initial_state, results):
+    path, stats = solver_func(initial_state)
+    # The worker's deadlock table is a copy, so what it learned on this level goes back with the result
+    board = initial_state.board
+    patterns = {}
+    if board.deadlock_table is not None:
+        patterns[board.layout_key] = board.deadlock_table.levels.get(board.layout_key, {})
+    results.put((name, path, stats, patterns))
+
+
+class Portfolio:
+    # Runs several solvers on the same level at the same time, one worker process each, and hands
+    # back every result as soon as that solver finishes. A process per solver (rather than a shared
+    # pool) means a solver that runs past its timeout can be terminated on its own.
+    # timeouts is either one number of seconds for every solver or a dict of name -> seconds.
+    # With a SolutionCache, solvers that already solved this level are not started and their
+    # stored result comes out of the first poll(), new solutions are added to the cache.
+    # Deadlock patterns the workers learn are merged into the initial state's DeadlockTable
+    def __init__(self, initial_state, solvers, timeouts=None, on_result=None, cache=None):
+        self.initial_state = initial_state
+        self.solvers = dict(solvers)
+        self.timeouts = timeouts
+        self.on_result = on_result  # Called with (name, path, stats) for each result as it arrives
+        self.cache = cache
+        self.cached = []  # Cache hits not yet handed out by poll()
+        self.results = {}  # name -> (path, stats)
+        self.processes = {}
+        self.started_at = {}
+        self.queue = None
+
+    def timeout_of(self, name):
+        if isinstance(self.timeouts, dict):
+            return self.timeouts.get(name)
+        return self.timeouts
+
+    def start(self):
+        self.queue = multiprocessing.Queue()
+        for name, solver_func in self.solvers.items():
+            if self.cache is not None:
+                hit = self.cache.get(name, solver_func, self.initial_state)
+                if hit is not None:
+                    self.cached.append((name,) + hit)
+                    continue
+            process = multiprocessing.Process(target=_run_solver,
+                                              args=(name, solver_func, self.initial_state, self.queue),
+                                              daemon=True)
+            process.start()
+            self.processes[name] = process
+            self.started_at[name] = time.time()
+        return self
+
+    def poll(self):
+        # Non-blocking: collect whatever has finished since the last call and stop solvers that ran
+        # out of time. Returns the new (name, path, stats) results
+        finished = []
+        while self.cached:
+            name, path, stats = self.cached.pop(0)
+            self.results[name] = (path, stats)
+            if self.on_result is not None:
+                self.on_result(name, path, stats)
+            finished.append((name, path, stats))
+        while True:
+            try:
+                name, path, stats, patterns = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if patterns:
+                self.initial_state.board.deadlock_table.merge(patterns)
+            if name in self.processes:  # Otherwise it already timed out
+                finished.append(self._finish(name, path, stats))
+
+        now = time.time()
+        for name, process in list(self.processes.items()):
+            elapsed = now - self.started_at[name]
+            timeout = self.timeout_of(name)
+            if timeout is not None and elapsed >= timeout:
+                process.terminate()
+                finished.append(self._finish(name, None, {
+                    "execution_time": elapsed,
+                    "explored_nodes": 0,
+                    "timed_out": True
+                }))
+            elif not process.is_alive() and process.exitcode != 0:
+                finished.append(self._finish(name, None, {  # Crashed before reporting
+                    "execution_time": elapsed,
+                    "explored_nodes": 0,
+                    "exit_code": process.exitcode
+                }))
+        return finished
+
+    def _finish(self, name, path, stats):
+        process = self.processes.pop(name)
+        process.join()
+        if self.cache is not None:
+            self.cache.put(name, self.solvers[name], self.initial_state, path, stats)
+            stats = dict(stats, **self.cache.counts())
+        self.results[name] = (path, stats)
+        if self.on_result is not None:
+            self.on_result(name, path, stats)
+        return name, path, stats
+
+    def done(self):
+        return not self.processes and not self.cached
+
+    def wait(self, interval=0.05):
+        # Block until every solver has reported or timed out
+        while not self.done():
+            self.poll()
+            if not self.done():
+                time.sleep(interval)
+        return self.results
+
+    def stop(self):
+        for process in self.processes.values():
+            process.terminate()
+            process.join()
+        self.processes.clear()
@@ -1,6 +1,8 @@
-from scipy.optimize import linear_sum_assignment
+from assignment import Assignment, INFINITE_COST
 import numpy as np
+import hashlib
 import math
+import random
 
 DIRECTIONS = {
     'U': (0, -1),
@@ -9,61 +11,83 @@ DIRECTIONS = {
     'R': (1, 0),
 }
 
+ZOBRIST_SEED = 0x5EED
 
-class SokobanState:
-    def __init__(self, grid, heuristic_type="manhattan"):
-
-        self.grid = [list(row) for row in grid]
-        self.height = len(self.grid)
-        self.width = len(self.grid[0]) if self.grid else 0
-        self.player = self.find_player()
-        self.boxes = self.find_boxes()
-        self.goals = self.find_goals()
-        self.empty_spaces = self.find_empty_spaces()
+
+def walk_path(parents, target):
+    # Rebuild the walking moves to target from a reachable() parent map
+    moves = []
+    step = parents[target]
+    while step is not None:
+        cell, direction = step
+        moves.append(direction)
+        step = parents[cell]
+    return ''.join(reversed(moves))
+
+
+class StaticBoard:
+    # Everything about a level that never changes during a search. It is built once per level
+    # and shared by every state, so successors only have to carry the player and the boxes.
+    def __init__(self, grid, heuristic_type="push", deadlock_table=None):
+        self.height = len(grid)
+        self.width = max((len(row) for row in grid), default=0)
+        level = [list(row.ljust(self.width)) for row in grid]
+
+        self.start_player = self.find_player(level)
+        self.start_boxes = self.find_boxes(level)
+        self.goals = self.find_goals(level)
         self.heuristic_type = heuristic_type
-        self.dead_squares = ()
+        self.deadlock_table = deadlock_table
+
+        # Static layout only: walls, goals and floor. Player and boxes live in the states
+        self.grid = [['#' if c == '#' else '.' if (x, y) in self.goals else ' ' for x, c in enumerate(row)]
+                     for y, row in enumerate(level)]
+        self.layout_key = hashlib.sha1('\n'.join(''.join(row) for row in self.grid).encode()).hexdigest()
+
+        self.neighbors = self.compute_neighbors()
+        self.floor = self.find_floor()
+        self.dead_squares = frozenset()
         self.compute_dead_squares()
 
-    def print_dead_squares(self):
-        for y in range(self.height):
-            row = ""
-            for x in range(self.width):
-                if (x, y) in self.dead_squares:
-                    row += "X"
-                else:
-                    row += self.grid[y][x]
-            print(row)
+        # True push distance from every cell to every goal (rows are cells, columns goal_list)
+        self.goal_list = sorted(self.goals, key=lambda cell: self.index(*cell))
+        self.push_distances = self.compute_push_distances()
+        self.push_rows = np.where(np.isinf(self.push_distances), INFINITE_COST, self.push_distances).astype(int).tolist()
+
+        # Integer cell numbering (index = y * width + x) used by the bitboard backend
+        self.cells = [(i % self.width, i // self.width) for i in range(self.width * self.height)]
+        self.index_neighbors = self.compute_index_neighbors()
+        self.wall_mask = self.to_mask((x, y) for x, y in self.cells if self.is_wall(x, y))
+        self.goal_mask = self.to_mask(self.goals)
+        self.dead_mask = self.to_mask(self.dead_squares)
+
+        # Zobrist keys per cell. A fixed seed keeps hashes identical across runs and processes
+        rng = random.Random(ZOBRIST_SEED)
+        self.zobrist_player = [rng.getrandbits(64) for _ in self.cells]
+        self.zobrist_box = [rng.getrandbits(64) for _ in self.cells]
 
-    def find_player(self):
+    def find_player(self, level):
         for y in range(self.height):
             for x in range(self.width):
-                if self.grid[y][x] == '@':
+                if level[y][x] in "@+":
                     return (x, y)
         return None
 
-    def find_boxes(self):
+    def find_boxes(self, level):
         box = []
         for y in range(self.height):
             for x in range(self.width):
-                if self.grid[y][x] == "$" or self.grid[y][x] == "*":
+                if level[y][x] == "$" or level[y][x] == "*":
                     box.append((x, y))
-        return set(box)
+        return frozenset(box)
 
-    def find_empty_spaces(self):
-        spaces = []
-        for y in range(self.height):
-            for x in range(self.width):
-                if self.grid[y][x] == " ":
-                    spaces.append((x, y))
-        return set(spaces)
-
-    def find_goals(self):
+    def find_goals(self, level):
         goal = []
         for y in range(self.height):
             for x in range(self.width):
-                if self.grid[y][x] == "." or self.grid[y][x] == "*":
+                if level[y][x] in ".*+":
                     goal.append((x, y))
-        return set(goal)
+        return frozenset(goal)
 
     def is_wall(self, x, y):
         return self.grid[y][x] == "#"
@@ -71,244 +95,431 @@ class SokobanState:
     def is_inside_bounds(self, x, y):
         return 0 <= x < self.width and 0 <= y < self.height
 
-    def is_goal(self):
-        return self.boxes == self.goals
+    def compute_neighbors(self):
+        # For every open cell: (direction, adjacent cell, cell beyond it) for each direction the
+        # player can step into. The beyond cell is None when a pushed box could not land there
+        neighbors = {}
+        for y in range(self.height):
+            for x in range(self.width):
+                if self.is_wall(x, y):
+                    continue
+                moves = []
+                for direction, (dx, dy) in DIRECTIONS.items():
+                    nx, ny = x + dx, y + dy
+                    bx, by = x + 2*dx, y + 2*dy
+                    if not self.is_inside_bounds(nx, ny) or self.is_wall(nx, ny):
+                        continue
+                    beyond = (bx, by)
+                    if not self.is_inside_bounds(bx, by) or self.is_wall(bx, by):
+                        beyond = None
+                    moves.append((direction, (nx, ny), beyond))
+                neighbors[(x, y)] = tuple(moves)
+        return neighbors
+
+    def find_floor(self):
+        # Every open cell inside the level, i.e. reachable from the player when boxes are ignored
+        if self.start_player is None:
+            return frozenset()
+        floor = {self.start_player}
+        frontier = [self.start_player]
+        for cell in frontier:
+            for _, adjacent, _ in self.neighbors[cell]:
+                if adjacent not in floor:
+                    floor.add(adjacent)
+                    frontier.append(adjacent)
+        return frozenset(floor)
+
+    def compute_push_distances(self):
+        # Reverse "pull" BFS from each goal over the static walls. A box at cell can be pulled to
+        # adjacent when the player has room to step back to beyond, which is the reverse of pushing
+        # it from adjacent to cell. Cells a goal never reaches stay infinite (they are dead squares)
+        distances = np.full((self.width * self.height, len(self.goal_list)), np.inf)
+        for j, goal in enumerate(self.goal_list):
+            distances[self.index(*goal), j] = 0
+            frontier = [goal]
+            for cell in frontier:
+                dist = distances[self.index(*cell), j] + 1
+                for _, adjacent, beyond in self.neighbors[cell]:
+                    if beyond is None:
+                        continue
+                    i = self.index(*adjacent)
+                    if distances[i, j] == np.inf:
+                        distances[i, j] = dist
+                        frontier.append(adjacent)
+        return distances
+
+    def cost_row(self, box):
+        # Heuristic cost from one box to every goal in goal_list, a row of the assignment matrix
+        x, y = box
+        if self.heuristic_type == "push":
+            return self.push_rows[y * self.width + x]
+        if self.heuristic_type == "manhattan":
+            return [abs(x - gx) + abs(y - gy) for gx, gy in self.goal_list]
+        if self.heuristic_type == "euclidean":
+            return [math.hypot(x - gx, y - gy) for gx, gy in self.goal_list]
+        raise ValueError(f"Unknown heuristic: {self.heuristic_type}")
+
+    def index(self, x, y):
+        return y * self.width + x
+
+    def to_mask(self, cells):
+        mask = 0
+        for x, y in cells:
+            mask |= 1 << self.index(x, y)
+        return mask
+
+    def from_mask(self, mask):
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append(self.cells[low.bit_length() - 1])
+            mask ^= low
+        return frozenset(cells)
+
+    def zobrist(self, player, boxes):
+        # Full hash of a position, only needed for a starting state. Successors update it incrementally
+        key = self.zobrist_player[self.index(*player)]
+        for box in boxes:
+            key ^= self.zobrist_box[self.index(*box)]
+        return key
+
+    def compute_index_neighbors(self):
+        # Same table as neighbors, but with cell indices and -1 for a blocked beyond cell
+        index_neighbors = [()] * (self.width * self.height)
+        for (x, y), moves in self.neighbors.items():
+            index_neighbors[self.index(x, y)] = tuple(
+                (direction, self.index(*adjacent), -1 if beyond is None else self.index(*beyond))
+                for direction, adjacent, beyond in moves
+            )
+        return index_neighbors
+
+    def print_dead_squares(self, player=None, boxes=()):
+        for y in range(self.height):
+            row = ""
+            for x in range(self.width):
+                if (x, y) in self.dead_squares:
+                    row += "X"
+                elif (x, y) == player:
+                    row += "@"
+                elif (x, y) in boxes:
+                    row += "*" if (x, y) in self.goals else "$"
+                else:
+                    row += self.grid[y][x]
+            print(row)
 
     def compute_dead_squares(self):
-        self.dead_squares = set()
-        for x,y in self.empty_spaces:
-            if(x, y) in self.goals:
-                continue
-
-            if self.is_corner(x,y):
-                self.dead_squares.add((x,y))
-
-            if self.is_tunnel_deadlock(x, y):
-                self.dead_squares.add((x,y))
-
-            if self.wall_deadlock(x,y):
-                self.dead_squares.add((x,y))
-
-    def wall_deadlock(self, x, y):
-        # Check all four sides to see if the square touches a wall and can be pushed away from it
-        if self.is_wall(x + 1, y):
-            if self._check_wall_line(x + 1, y, vertical=True):
-                if not self._can_push_along_wall(x, y, wall_side='right'):
-                    return True
-
-        if self.is_wall(x - 1, y):
-            if self._check_wall_line(x - 1, y, vertical=True):
-                if not self._can_push_along_wall(x, y, wall_side='left'):
-                    return True
-
-        if self.is_wall(x, y + 1):
-            if self._check_wall_line(x, y + 1, vertical=False):
-                if not self._can_push_along_wall(x, y, wall_side='bottom'):
-                    return True
-
-        if self.is_wall(x, y - 1):
-            if self._check_wall_line(x, y - 1, vertical=False):
-                if not self._can_push_along_wall(x, y, wall_side='top'):
-                    return True
+        # Pull a virtual box backwards from every goal at once. A box can be pulled from cell to
+        # adjacent when the player has room to step back to beyond, which is the reverse of a push.
+        # Any floor cell (including those under the player or a box) that is never reached can't be
+        # pushed onto any goal, so a box there is dead. Each cell is visited once
+        live = set(self.goals)
+        frontier = list(live)
+        for cell in frontier:
+            for _, adjacent, beyond in self.neighbors[cell]:
+                if beyond is not None and adjacent not in live:
+                    live.add(adjacent)
+                    frontier.append(adjacent)
+        self.dead_squares = self.floor - live
 
-        return False
 
-    def _check_wall_line(self, wall_x, wall_y, vertical):
+class SokobanState:
+    # A state is only the player position and an immutable set of box positions.
+    # Walls, goals and dead squares are shared through the level's StaticBoard
+    # hash_key is the Zobrist hash of the position, kept up to date as the player and boxes move.
+    # matching is the heuristic's box-goal Assignment once computed, or (parent Assignment, old cell,
+    # new cell) after a push so heuristic() can repair the parent's matching instead of solving again
+    __slots__ = ("board", "player", "boxes", "hash_key", "matching")
+
+    def __init__(self, grid, heuristic_type="push", deadlock_table=None):
+        self.board = StaticBoard(grid, heuristic_type, deadlock_table)
+        self.player = self.board.start_player
+        self.boxes = self.board.start_boxes
+        self.hash_key = self.board.zobrist(self.player, self.boxes)
+        self.matching = None
+
+    @classmethod
+    def from_parts(cls, board, player, boxes):
+        # Any position on an existing board, e.g. for sub-searches on part of the boxes
+        new_state = object.__new__(cls)
+        new_state.board = board
+        new_state.player = player
+        new_state.boxes = frozenset(boxes)
+        new_state.hash_key = board.zobrist(player, new_state.boxes)
+        new_state.matching = None
+        return new_state
 
-        # Determine scan direction along the wall line (perpendicular to wall)
-        if vertical:
-            for offset in range(-self.height, self.height):
-                ny = wall_y + offset
-                if not self.is_inside_bounds(wall_x, ny):
-                    continue
+    def _make(self, player, boxes, hash_key, matching=None):
+        # Build a state on the same board without going through __init__
+        new_state = object.__new__(type(self))
+        new_state.board = self.board
+        new_state.player = player
+        new_state.boxes = boxes
+        new_state.hash_key = hash_key
+        new_state.matching = matching
+        return new_state
 
-                # If there's a gap then box can be pushed from that position
-                if not self.is_wall(wall_x, ny):
-                    return False
+    def pushed_matching(self, old_cell, new_cell):
+        # What a child gets after moving the box at old_cell to new_cell
+        if self.matching is None:
+            return None
+        if isinstance(self.matching, tuple):
+            self.assignment()  # Settle a pending repair first so children never chain them
+        return (self.matching, old_cell, new_cell)
 
-                # If there is a goal adjacent to the wall line no deadlock
-                if (wall_x - 1, ny) in self.goals or (wall_x + 1, ny) in self.goals:
-                    return False
+    @property
+    def grid(self):
+        return self.board.grid
 
-        else:
-            for offset in range(-self.width, self.width):
-                nx = wall_x + offset
-                if not self.is_inside_bounds(nx, wall_y):
-                    continue
+    @property
+    def width(self):
+        return self.board.width
 
-                if not self.is_wall(nx, wall_y):
-                    return False
+    @property
+    def height(self):
+        return self.board.height
 
-                if (nx, wall_y - 1) in self.goals or (nx, wall_y + 1) in self.goals:
-                    return False
+    @property
+    def goals(self):
+        return self.board.goals
 
-        return True # return True if wall is continuous along entire line
+    @property
+    def dead_squares(self):
+        return self.board.dead_squares
 
-    def _can_push_along_wall(self, x, y, wall_side):
-        if wall_side in ('left', 'right'): #Vertical vs hroizontal directional pushes
-            push_dirs = [(-1, 0), (1, 0)]
-        else:
-            push_dirs = [(0, -1), (0, 1)]
+    @property
+    def floor(self):
+        return self.board.floor
 
-        for dx, dy in push_dirs:
+    @property
+    def heuristic_type(self):
+        return self.board.heuristic_type
 
-            px, py = x - dx, y - dy # player must stand at (x - dx, y - dy) to be able to push the box
-            bx, by = x + dx, y + dy # box moves to (x + dx, y + dy) after player
+    def print_dead_squares(self):
+        self.board.print_dead_squares(self.player, self.boxes)
 
-            if not self.is_inside_bounds(px, py) or not self.is_inside_bounds(bx, by):
-                continue
+    def is_wall(self, x, y):
+        return self.board.is_wall(x, y)
 
-            # To push, player pos must not be in position of a wall or box, and box destination must be free
-            if (not self.is_wall(px, py) and (px, py) not in self.boxes and
-                    not self.is_wall(bx, by)):
-                return True
+    def is_inside_bounds(self, x, y):
+        return self.board.is_inside_bounds(x, y)
 
-        return False
+    def is_goal(self):
+        return self.boxes == self.board.goals
+
+    def has_box(self, cell):
+        return cell in self.boxes
+
+    @property
+    def player_index(self):
+        return self.board.index(*self.player)
+
+    @property
+    def box_mask(self):
+        # Boxes as a bitmask of cell indices, BitboardState stores this directly
+        return self.board.to_mask(self.boxes)
+
+    def freeze_deadlock(self, box):
+        # A box that can move along neither axis is frozen. Only a deadlock if the frozen cluster
+        # holds a box that is not on a goal
+        cluster = []
+        if not self.is_frozen(box, set(), cluster):
+            return False
+        goals = self.board.goals
+        return any(b not in goals for b in cluster)
+
+    def is_frozen(self, box, checked, cluster):
+        # While a box is being checked it acts as a wall for its neighbours (this also stops cycles).
+        # Frozen boxes are collected in cluster; boxes from a failed check are dropped again
+        mark = len(cluster)
+        checked.add(box)
+        frozen = (self._blocked_on_axis(box, 1, 0, checked, cluster) and
+                  self._blocked_on_axis(box, 0, 1, checked, cluster))
+        checked.discard(box)
+        if frozen:
+            cluster.append(box)
+        else:
+            del cluster[mark:]
+        return frozen
 
-    def is_tunnel_deadlock(self, x, y):
-        # Count available directions
-        exits = 0
-        for dx, dy in DIRECTIONS.values():
-            if not self.is_wall(x + dx, y + dy):
-                exits += 1
-
-        # Single-exit tunnel with no goal in line
-        if exits == 1:
-            # Find the open direction
-            for dx, dy in DIRECTIONS.values():
-                if not self.is_wall(x + dx, y + dy):
-                    # Check if there's a goal in this direction
-                    nx, ny = x + dx, y + dy
-                    while self.is_inside_bounds(nx, ny) and not self.is_wall(nx, ny):
-                        if (nx, ny) in self.goals:
-                            return False
-                        nx += dx
-                        ny += dy
-                    return True
-        return False
+    def _blocked_on_axis(self, box, dx, dy, checked, cluster):
+        board = self.board
+        x, y = box
+        before = (x - dx, y - dy)
+        after = (x + dx, y + dy)
 
-    def is_corner(self, x, y):
-        if (
-                (self.is_wall(x + 1, y) and self.is_wall(x, y + 1)) or
-                (self.is_wall(x - 1, y) and self.is_wall(x, y + 1)) or
-                (self.is_wall(x + 1, y) and self.is_wall(x, y - 1)) or
-                (self.is_wall(x - 1, y) and self.is_wall(x, y - 1))
-        ):
-            # print("Corner")
+        # A wall (or a box under check) on either side
+        if board.is_wall(*before) or board.is_wall(*after) or before in checked or after in checked:
             return True
-        return False
-
-    def freeze_deadlock(self):
-        for x, y in self.boxes:
-            # Skip if on goal
-            if (x, y) in self.goals:
-                continue
 
-            # Horizontal pair (x, y) and (x+1, y)
-            if (x + 1, y) in self.boxes and (x + 1, y) not in self.goals:
-                # Check if both boxes are against top or bottom wall
-                top_wall = self.is_wall(x, y - 1) and self.is_wall(x + 1, y - 1)
-                bottom_wall = self.is_wall(x, y + 1) and self.is_wall(x + 1, y + 1)
+        # Dead squares on both sides, the box can't go anywhere useful along this axis
+        if before in board.dead_squares and after in board.dead_squares:
+            return True
 
-                if top_wall or bottom_wall:
-                    return True
+        # A frozen box on either side
+        if self.has_box(before) and self.is_frozen(before, checked, cluster):
+            return True
+        if self.has_box(after) and self.is_frozen(after, checked, cluster):
+            return True
 
-            # Vertical pair (x, y) and (x, y+1)
-            if (x, y + 1) in self.boxes and (x, y + 1) not in self.goals:
-                # Check if both boxes are against left or right wall
-                left_wall = self.is_wall(x - 1, y) and self.is_wall(x - 1, y + 1)
-                right_wall = self.is_wall(x + 1, y) and self.is_wall(x + 1, y + 1)
+        return False
 
-                if left_wall or right_wall:
-                    return True
+    def is_deadlocked(self, box=None):
+        # Only the box that just moved can create a new deadlock, so with a box only its cell and
+        # neighbourhood are checked. Without one every box is checked (e.g. a starting position)
+        if box is None:
+            return any(self.is_deadlocked(b) for b in self.boxes)
 
-        return False
+        if box in self.board.dead_squares:
+            return True
+        if self.freeze_deadlock(box):
+            return True
 
-    def is_deadlocked(self):
-        for box in self.boxes:
-            if box in self.dead_squares:
-                return True
-        if self.freeze_deadlock():
+        # Learned patterns around the box that just moved
+        table = self.board.deadlock_table
+        if table is not None and table.is_dead(self, box):
             return True
 
         return False
 
     def clone(self):
-        new_state = SokobanState([''.join(row) for row in self.grid])
-        new_state.player = self.player
-        new_state.boxes = self.boxes.copy()
-        new_state.goals = self.goals.copy()
-        new_state.dead_squares = self.dead_squares
-        return new_state
+        # Boxes are immutable, so a clone can share them
+        return self._make(self.player, self.boxes, self.hash_key, self.matching)
 
     def get_successors(self, skip_deadlock_check=False):
         successors = []
-
+        boxes = self.boxes
+        board = self.board
+        width = board.width
+        zobrist_player = board.zobrist_player
+        zobrist_box = board.zobrist_box
         px, py = self.player
+        base_key = self.hash_key ^ zobrist_player[py * width + px]
 
-        for direction, (dx, dy) in DIRECTIONS.items():
-            nx, ny = px + dx, py + dy # Adjacent tile
-            bx, by = px + 2*dx, py + 2*dy  # Beyond box tile
-
-            if not self.is_inside_bounds(nx, ny):
-                continue
-            target = self.grid[ny][nx]
+        for direction, adjacent, beyond in board.neighbors[self.player]:
+            ax, ay = adjacent
+            key = base_key ^ zobrist_player[ay * width + ax]
 
             # Move in an empty/goal direction
-            if target in " .":
-                new_state = self.clone()
-                new_state.grid[py][px] = " "
-                new_state.grid[ny][nx] = "@"
-                new_state.player = (nx, ny)
-                new_state.boxes = new_state.find_boxes()
-
-                successors.append((direction, new_state))
-
-            # Move in box direction
-            elif target in "$*":
-                if not self.is_inside_bounds(bx, by):
-                    continue
-                beyond = self.grid[by][bx]
-                if beyond in " .":
-                    new_state = self.clone()
-                    new_state.grid[py][px] = " "
-                    new_state.grid[ny][nx] = "@"
-                    new_state.grid[by][bx] = "$"
-                    new_state.player = (nx, ny)
-                    new_state.boxes = new_state.find_boxes()
-                    if skip_deadlock_check or not new_state.is_deadlocked():
-                        successors.append((direction, new_state))
+            if adjacent not in boxes:
+                successors.append((direction, self._make(adjacent, boxes, key, self.matching)))
+
+            # Move in box direction, the tile beyond the box must be free
+            elif beyond is not None and beyond not in boxes:
+                bx, by = beyond
+                key ^= zobrist_box[ay * width + ax] ^ zobrist_box[by * width + bx]
+                new_state = self._make(adjacent, boxes.difference((adjacent,)).union((beyond,)), key,
+                                       self.pushed_matching(adjacent, beyond))
+                if skip_deadlock_check or not new_state.is_deadlocked(beyond):
+                    successors.append((direction, new_state))
 
         return successors
 
-    def heuristic(self):
-        num_boxes = len(self.boxes)
-        num_goals = len(self.goals)
-
+    def hash_player(self):
+        # The player cell that is part of hash_key
+        return self.player
+
+    def reachable(self):
+        # Flood fill of every cell the player can walk to without pushing a box.
+        # Maps each cell to (previous cell, direction) so the walk can be rebuilt with walk_path
+        boxes = self.boxes
+        neighbors = self.board.neighbors
+        parents = {self.player: None}
+        frontier = [self.player]
+        for cell in frontier:
+            for direction, adjacent, _ in neighbors[cell]:
+                if adjacent not in parents and adjacent not in boxes:
+                    parents[adjacent] = (cell, direction)
+                    frontier.append(adjacent)
+        return parents
+
+    def get_push_successors(self, skip_deadlock_check=False):
+        # One successor per legal push anywhere in the player's reachable area.
+        # The move string is the walk to the pushing position followed by the push itself
+        successors = []
+        boxes = self.boxes
+        board = self.board
+        width = board.width
+        neighbors = board.neighbors
+        zobrist_player = board.zobrist_player
+        zobrist_box = board.zobrist_box
+        hx, hy = self.hash_player()
+        base_key = self.hash_key ^ zobrist_player[hy * width + hx]
+
+        parents = self.reachable()
+        for cell in parents:
+            for direction, adjacent, beyond in neighbors[cell]:
+                if adjacent not in boxes or beyond is None or beyond in boxes:
+                    continue
+                ax, ay = adjacent
+                bx, by = beyond
+                key = (base_key ^ zobrist_player[ay * width + ax] ^
+                       zobrist_box[ay * width + ax] ^ zobrist_box[by * width + bx])
+                new_state = self._make(adjacent, boxes.difference((adjacent,)).union((beyond,)), key,
+                                       self.pushed_matching(adjacent, beyond))
+                if skip_deadlock_check or not new_state.is_deadlocked(beyond):
+                    successors.append((walk_path(parents, cell) + direction, new_state))
 
-        cost_matrix = np.zeros((num_boxes, num_goals)) # Matrix of of cost (boxes x goals)
+        return successors
 
-        for i, box in enumerate(self.boxes):
-            for j, goal in enumerate(self.goals):
-                if self.heuristic_type == "manhattan":
-                    dist = abs(box[0] - goal[0]) + abs(box[1] - goal[1])
-                elif self.heuristic_type == "euclidean":
-                    dist = math.hypot(box[0] - goal[0], box[1] - goal[1])
-                else:
-                    raise ValueError(f"Unknown heuristic: {self.heuristic_type}")
-                cost_matrix[i][j] = dist  # Add values to matrix
+    def get_predecessors(self):
+        # Reverse of get_push_successors for backward search: from any reachable cell the player
+        # pulls an adjacent box onto that cell and steps back. Each entry is (direction of the push
+        # that undoes the pull, predecessor), the predecessor's player stands where that push starts
+        predecessors = []
+        boxes = self.boxes
+        board = self.board
+        width = board.width
+        zobrist_player = board.zobrist_player
+        zobrist_box = board.zobrist_box
+        hx, hy = self.hash_player()
+        base_key = self.hash_key ^ zobrist_player[hy * width + hx]
+
+        for cell in self.reachable():
+            cx, cy = cell
+            for direction, adjacent, _ in board.neighbors[cell]:
+                if adjacent not in boxes:
+                    continue
+                dx, dy = DIRECTIONS[direction]
+                bx, by = cx - dx, cy - dy
+                if not board.is_inside_bounds(bx, by) or board.is_wall(bx, by) or (bx, by) in boxes:
+                    continue
+                ax, ay = adjacent
+                key = (base_key ^ zobrist_player[by * width + bx] ^
+                       zobrist_box[ay * width + ax] ^ zobrist_box[cy * width + cx])
+                predecessors.append((direction, self._make((bx, by), boxes.difference((adjacent,)).union((cell,)), key)))
+
+        return predecessors
+
+    def assignment(self):
+        # Optimal box-goal matching (Hungarian algorithm). After a push only the moved box's row
+        # changed, so the parent's matching is repaired; a full solve is the fallback
+        matching = self.matching
+        if isinstance(matching, tuple):
+            parent, old_cell, new_cell = matching
+            matching = parent.repair(old_cell, new_cell, self.board.cost_row(new_cell))
+        elif matching is None:
+            boxes = list(self.boxes)
+            matching = Assignment.solve(boxes, [self.board.cost_row(box) for box in boxes])
+        self.matching = matching
+        return matching
 
-        row_ind, col_ind = linear_sum_assignment(cost_matrix) # Find the optimal assignment of boxes to unique goals using the Hungarian algorithm
+    def heuristic(self):
+        boxes = self.boxes
+        player = self.player
+        if len(boxes) > len(self.board.goal_list):
+            return math.inf  # Some box can never be on a goal
 
-        distances = cost_matrix[row_ind, col_ind]
-        total_distance = distances.sum()
+        distances = self.assignment().costs()
+        if max(distances) >= INFINITE_COST:
+            return math.inf  # No assignment where every box can still reach its goal
+        total_distance = sum(distances)
 
-        max_distance = distances.max() # Farthest box to goal distance
+        max_distance = max(distances) # Farthest box to goal distance
         total_distance += 0.2 * max_distance  # Weight far boxes more
 
         player_box_distance = min(
-            abs(self.player[0] - box[0]) + abs(self.player[1] - box[1]) #Add the distance from player to closest box to encourage movement towards boxes
-            for box in self.boxes
+            abs(player[0] - box[0]) + abs(player[1] - box[1]) #Add the distance from player to closest box to encourage movement towards boxes
+            for box in boxes
         )
         total_distance += 0.5 * player_box_distance  # Weighted influence
         #Using higher weight seems to slightly improve in exploring the solution
@@ -319,12 +530,13 @@ class SokobanState:
         return (self.player, self.boxes) < (other.player, other.boxes)
 
     def __hash__(self):
-        # Use sorted boxes for invariant state representation
-        return hash((self.player, tuple(sorted(self.boxes))))
+        return self.hash_key
 
     def __eq__(self, other):
-        return (self.player == other.player and
-                sorted(self.boxes) == sorted(other.boxes))
+        # Sets only compare on a hash match, the full position check is just a safeguard against collisions
+        return (self.hash_key == other.hash_key and
+                self.player == other.player and
+                self.boxes == other.boxes)
 
     def __str__(self):
         display = [row.copy() for row in self.grid]
@@ -346,3 +558,62 @@ class SokobanState:
             display[py][px] = '@'
 
         return '\n'.join(''.join(row) for row in display)
+
+
+class PushState(SokobanState):
+    # Push-level view of a position for the solvers: get_successors only returns box pushes,
+    # and positions that differ only in where the player stands inside the same reachable area
+    # are equal. The hash uses the top-left reachable cell (canonical) instead of the player,
+    # while player keeps the real position so the walking moves can be rebuilt
+    __slots__ = ("canonical",)
+
+    def __init__(self, grid, heuristic_type="push", deadlock_table=None):
+        super().__init__(grid, heuristic_type, deadlock_table)
+        self.normalize()
+
+    @classmethod
+    def from_state(cls, state):
+        new_state = object.__new__(cls)
+        new_state.board = state.board
+        new_state.player = state.player
+        new_state.boxes = state.boxes
+        new_state.hash_key = state.board.zobrist(state.player, state.boxes)
+        new_state.matching = state.matching
+        new_state.normalize()
+        return new_state
+
+    def _make(self, player, boxes, hash_key, matching=None):
+        new_state = super()._make(player, boxes, hash_key, matching)
+        new_state.normalize()
+        return new_state
+
+    def normalize(self):
+        # Swap the player's Zobrist key for the one of the canonical cell
+        width = self.board.width
+        zobrist_player = self.board.zobrist_player
+        canonical = min(self.reachable(), key=lambda cell: cell[1] * width + cell[0])
+        px, py = self.player
+        cx, cy = canonical
+        self.hash_key ^= zobrist_player[py * width + px] ^ zobrist_player[cy * width + cx]
+        self.canonical = canonical
+
+    def hash_player(self):
+        return self.canonical
+
+    def clone(self):
+        new_state = SokobanState._make(self, self.player, self.boxes, self.hash_key, self.matching)
+        new_state.canonical = self.canonical
+        return new_state
+
+    def get_successors(self, skip_deadlock_check=False):
+        return self.get_push_successors(skip_deadlock_check)
+
+    def __lt__(self, other):
+        return (self.canonical, self.boxes) < (other.canonical, other.boxes)
+
+    __hash__ = SokobanState.__hash__
+
+    def __eq__(self, other):
+        return (self.hash_key == other.hash_key and
+                self.canonical == other.canonical and
+                self.boxes == other.boxes)
@@ -1,9 +1,63 @@
+import threading
 import time
 from level_loader import load_images
+from solvers.budget import SearchBudget
 from state_display import *
 from you_win import you_win
 
+
+class SolveThread(threading.Thread):
+    # Runs the solver next to the pygame loop so the window keeps drawing. The budget carries
+    # the live progress (expansions) for the HUD and the cancel flag
+    def __init__(self, solver_func, state):
+        super().__init__(daemon=True)
+        self.solver_func = solver_func
+        self.state = state
+        self.budget = SearchBudget()
+        self.result = None
+
+    def run(self):
+        self.result = self.solver_func(self.state, budget=self.budget)
+
+
+class SolutionIndex:
+    # Every state along the solutions found this session, mapped to where its remaining moves
+    # start in that solution. A solve request from a state on a known path, or one move away from
+    # one (e.g. after a single step off it), is answered from here without a new search
+    def __init__(self):
+        self.suffixes = {}  # state -> (solution, index of its next move)
+
+    def add(self, state, solution):
+        for i in range(len(solution) + 1):
+            known = self.suffixes.get(state)
+            if known is None or len(known[0]) - known[1] > len(solution) - i:
+                self.suffixes[state] = (solution, i)
+            if i == len(solution):
+                break
+            for direction, next_state in state.get_successors(skip_deadlock_check=True):
+                if direction == solution[i]:
+                    state = next_state
+                    break
+            else:
+                break  # Does not replay from here, keep what was indexed so far
+
+    def lookup(self, state):
+        # Shortest known way to the goal from state, or None if it is off every known path
+        best = None
+        known = self.suffixes.get(state)
+        if known is not None:
+            best = known[0][known[1]:]
+        for direction, next_state in state.get_successors(skip_deadlock_check=True):
+            known = self.suffixes.get(next_state)
+            if known is not None and (best is None or len(known[0]) - known[1] + 1 < len(best)):
+                best = direction + known[0][known[1]:]
+        return best
+
+
 def run_solo_game(initial_state, astar_solver_func, theme):
+    # astar_solver_func(state, budget=...) runs in a SolveThread when the AI button is pressed,
+    # C cancels it and the animation starts once its path arrives. Paths found are kept in a
+    # SolutionIndex, so asking again from a state on (or next to) one of them needs no search
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Sokoban Solo Play")
@@ -33,6 +87,9 @@ def run_solo_game(initial_state, astar_solver_func, theme):
     ai_animation_timer = 0
     ai_solve_time = 0
     ai_failed_to_solve = False
+    solve_thread = None  # Running background solve, if any
+    solution_index = SolutionIndex()
+    ai_from_index = False  # The running animation came from the index, not a new search
 
     win_delay_timer = 0
     win_delay_duration = 1000  # milliseconds delay after finishes moves
@@ -52,11 +109,37 @@ def run_solo_game(initial_state, astar_solver_func, theme):
         dt = clock.tick(60)
         ai_animation_timer += dt
 
+        if solve_thread is not None and not solve_thread.is_alive():
+            ai_solution, ai_stats = solve_thread.result or (None, None)
+            if ai_solution:
+                solution_index.add(solve_thread.state, ai_solution)
+            solve_thread = None
+            ai_solve_time = ai_stats['execution_time'] if ai_stats else 0
+            ai_from_index = False
+            if ai_stats and ai_stats.get("stopped_reason") == "cancelled":
+                player_time_running = True  # Back to playing from where the player was
+            elif ai_solution:
+                ai_solving = True
+                ai_solution_index = 0
+                ai_animation_timer = 0
+                win_delay_timer = 0
+                ai_failed_to_solve = False
+            else:
+                ai_failed_to_solve = True
+                player_time_running = False
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if solve_thread is not None:
+                    solve_thread.budget.cancel()
                 pygame.quit()
                 return None
 
+            if solve_thread is not None:
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_c:
+                    solve_thread.budget.cancel()  # Picked up on the next frame once the solver stops
+                continue
+
             if waiting_for_input:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_m:
@@ -129,19 +212,21 @@ def run_solo_game(initial_state, astar_solver_func, theme):
                                 break
 
             elif event.type == pygame.MOUSEBUTTONDOWN and not waiting_for_input:
-                if ai_button_rect.collidepoint(event.pos):  # Solve with AI
+                if ai_button_rect.collidepoint(event.pos) and not ai_solving:  # Solve with AI
                     player_time_running = False
-                    ai_solution, ai_stats = astar_solver_func(current_state)
-                    ai_solve_time = ai_stats['execution_time'] if ai_stats else 0
-                    if ai_solution:
+                    known_solution = solution_index.lookup(current_state)
+                    if known_solution is not None:
+                        ai_solution = known_solution
+                        ai_solve_time = 0
+                        ai_from_index = True
                         ai_solving = True
                         ai_solution_index = 0
                         ai_animation_timer = 0
                         win_delay_timer = 0
                         ai_failed_to_solve = False
                     else:
-                        ai_failed_to_solve = True
-                        player_time_running = False
+                        solve_thread = SolveThread(astar_solver_func, current_state)
+                        solve_thread.start()
 
                 elif reset_button_rect.collidepoint(event.pos):  # Reset game
                     current_state = initial_state.clone()
@@ -175,8 +260,15 @@ def run_solo_game(initial_state, astar_solver_func, theme):
         steps_text = font.render(f"Steps: {steps}", True, (255, 255, 255))
         screen.blit(steps_text, (10, 10))
 
-        if ai_solving:
-            ai_time_text = font.render(f"AI solve time: {ai_solve_time:.4f} s", True, (255, 255, 255))
+        if solve_thread is not None:
+            progress = solve_thread.budget
+            ai_progress_text = font.render(
+                f"AI thinking: {progress.expansions} nodes, {progress.elapsed():.1f} s (C to cancel)", True,
+                (255, 255, 255))
+            screen.blit(ai_progress_text, (10, 40))
+        elif ai_solving:
+            ai_time_text = font.render("AI solution from an earlier solve" if ai_from_index else
+                                       f"AI solve time: {ai_solve_time:.4f} s", True, (255, 255, 255))
             screen.blit(ai_time_text, (10, 40))
         else:
             elapsed = time.time() - start_time if player_time_running else 0
@@ -185,7 +277,7 @@ def run_solo_game(initial_state, astar_solver_func, theme):
 
         # Draw buttons
         pygame.draw.rect(screen, (70, 130, 180), ai_button_rect)
-        button_text = font.render("Solve with AI", True, (255, 255, 255))
+        button_text = font.render("Solving..." if solve_thread is not None else "Solve with AI", True, (255, 255, 255))
         text_rect = button_text.get_rect(center=ai_button_rect.center)
         screen.blit(button_text, text_rect)
 
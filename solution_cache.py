@@ -0,0 +1,84 @@
+import hashlib
+import json
+import sqlite3
+import time
+from sokoban_state import SokobanState
+
+SOLUTION_CACHE_PATH = "solution_cache.sqlite3"
+MAX_ENTRIES = 500
+
+
+def level_text(state):
+    # Canonical text of a position: the rendered grid without trailing spaces, so the same level
+    # hashes the same however its file was padded or which file it came from
+    return "\n".join(line.rstrip() for line in str(state).splitlines()).strip("\n")
+
+
+def replays_to_goal(state, path):
+    # Step through the moves on a plain state, any illegal move or a non-goal end rejects the path
+    current = SokobanState.from_parts(state.board, state.player, state.boxes)
+    for move in path:
+        for direction, successor in current.get_successors(skip_deadlock_check=True):
+            if direction == move:
+                current = successor
+                break
+        else:
+            return False
+    return current.is_goal()
+
+
+class SolutionCache:
+    # Solver results kept on disk in sqlite, keyed by a hash of the level text plus the solver
+    # configuration (name, function and heuristic), so re-opening a level skips the solvers
+    # that already solved it. Only found solutions are stored, each one is replayed before it is
+    # handed out and dropped if it no longer works. Past max_entries the least recently used
+    # entries are evicted. hits and misses count this session's lookups
+    def __init__(self, path=SOLUTION_CACHE_PATH, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS solutions "
+            "(key TEXT PRIMARY KEY, path TEXT NOT NULL, stats TEXT NOT NULL, last_used REAL NOT NULL)")
+        self.connection.commit()
+
+    def key(self, name, solver_func, state):
+        config = [name, solver_func.__module__, solver_func.__qualname__, type(state).__name__,
+                  state.board.heuristic_type]
+        return hashlib.sha256((level_text(state) + "\0" + "\0".join(config)).encode()).hexdigest()
+
+    def counts(self):
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
+
+    def get(self, name, solver_func, state):
+        # (path, stats) of a stored solution, or None
+        key = self.key(name, solver_func, state)
+        row = self.connection.execute("SELECT path, stats FROM solutions WHERE key = ?", (key,)).fetchone()
+        if row is not None and not replays_to_goal(state, row[0]):
+            self.connection.execute("DELETE FROM solutions WHERE key = ?", (key,))
+            self.connection.commit()
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.connection.execute("UPDATE solutions SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.connection.commit()
+        return row[0], dict(json.loads(row[1]), cached=True, **self.counts())
+
+    def put(self, name, solver_func, state, path, stats):
+        if not path:
+            return  # Failures may come from a timeout or budget, they are not worth remembering
+        stats = {k: v for k, v in stats.items() if k not in ("cached", "cache_hits", "cache_misses")}
+        self.connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?)",
+                                (self.key(name, solver_func, state), path, json.dumps(stats, default=str),
+                                 time.time()))
+        self.connection.execute(
+            "DELETE FROM solutions WHERE key NOT IN "
+            "(SELECT key FROM solutions ORDER BY last_used DESC LIMIT ?)", (self.max_entries,))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -1,35 +1,173 @@
 import heapq
+import math
 import time
+from solvers.bucket_queue import BucketQueue
+from solvers.search_nodes import NodeStore
+from solvers.stepping import PROGRESS_INTERVAL, drain, progress
 
-def astar_solver(initial_state):
+F_SCALE = 10  # f is bucketed in tenths; the heuristic's 0.2/0.5 weights keep it exact for grid distances
+
+def astar_solver(initial_state, budget=None):
+    return drain(astar_search(initial_state, budget))
+
+
+def astar_search(initial_state, budget=None, progress_interval=PROGRESS_INTERVAL):
+    # Generator form of astar_solver, see solvers/stepping.py. best_f is the f being expanded
     start_time = time.time()
+    next_progress = start_time + progress_interval
     explored_nodes = 0
-    open_list = []
-    heapq.heappush(open_list, (initial_state.heuristic(), 0, initial_state, ""))
+    duplicates_suppressed = 0
+    nodes = NodeStore()
+    open_list = BucketQueue()
+    best_g = {initial_state: 0}  # Lowest g queued so far per state, worse duplicates never enter the open list
     visited = set()
 
+    def stats():
+        return {
+            "execution_time": time.time() - start_time,
+            "explored_nodes": explored_nodes,
+            "duplicates_suppressed": duplicates_suppressed
+        }
+
+    initial_h = initial_state.heuristic()
+    if math.isinf(initial_h):
+        yield "done", (None, stats())  # Unsolvable from the start, e.g. a box on a dead square
+        return
+    open_list.push(round(initial_h * F_SCALE), 0, (initial_state, nodes.root()))
+
     while open_list:
-        f, g, current_state, path = heapq.heappop(open_list)
+        f, g, (current_state, node) = open_list.pop()
 
-        if current_state in visited:
-            continue
+        if current_state in visited or g > best_g[current_state]:
+            continue  # Expanded already, or superseded by a cheaper entry pushed later
+        if budget is not None:
+            stopped_reason = budget.exceeded(explored_nodes, len(open_list), len(best_g))
+            if stopped_reason:
+                yield "done", (None, dict(stats(), stopped_reason=stopped_reason))
+                return
         visited.add(current_state)
         explored_nodes += 1
 
         if current_state.is_goal():
-            end_time = time.time()
-            return path,  {
-                "execution_time": end_time - start_time,
-                "explored_nodes": explored_nodes
-            }
+            yield "done", (nodes.path(node), stats())
+            return
+        if time.time() >= next_progress:
+            yield progress(start_time, explored_nodes, len(open_list), f / F_SCALE, g)
+            next_progress = time.time() + progress_interval
 
+        new_g = g + 1
         for direction, successor in current_state.get_successors():
             if successor not in visited:
-                new_g = g + 1
+                known_g = best_g.get(successor)
+                if known_g is not None and known_g <= new_g:
+                    duplicates_suppressed += 1
+                    continue
+                best_g[successor] = new_g
                 new_f = new_g + successor.heuristic()
-                heapq.heappush(open_list, (new_f, new_g, successor, path + direction))
+                if new_f == math.inf:
+                    continue  # No box assignment can reach the goals from here
+                open_list.push(round(new_f * F_SCALE), new_g, (successor, nodes.add(node, direction)))
+
+    yield "done", (None, stats()) #Even if no solution is found return the time it took to compute
+
+
+def anytime_astar_solver(initial_state, time_limit=5.0, weight=3.0, weight_step=0.5, on_solution=None, budget=None):
+    # Anytime repairing A*: search on f = g + weight * heuristic() so a first solution comes quickly,
+    # then lower the weight and continue from the same open/closed lists to tighten it until the
+    # deadline or weight 1. Every better solution is passed to on_solution(path, stats).
+    # A budget that runs out ends the search like the deadline, with the best solution so far
+    start_time = time.time()
+    deadline = start_time + time_limit
+    explored_nodes = 0
+    nodes = NodeStore()
+    counter = 0  # Heap tie-breaker so states are never compared
+
+    best_g = {initial_state: 0}
+    node_of = {initial_state: nodes.root()}
+    h_of = {initial_state: initial_state.heuristic()}
+    open_list = [(weight * h_of[initial_state], 0, counter, initial_state)]
+    closed = set()
+    inconsistent = []  # Improved while closed, reopened with the next weight
+
+    best_cost = math.inf
+    best_path = None
+    improvements = []
+
+    stopped_reason = None
+
+    def stats():
+        result = {
+            "execution_time": time.time() - start_time,
+            "explored_nodes": explored_nodes,
+            "weight": weight,
+            "improvements": improvements,
+        }
+        if stopped_reason:
+            result["stopped_reason"] = stopped_reason
+        return result
+
+    if initial_state.is_goal():
+        return "", stats()
+
+    while True:
+        # Expand while something on the open list could still beat the incumbent
+        while open_list and open_list[0][0] < best_cost:
+            if time.time() > deadline:
+                stopped_reason = "time"
+            elif budget is not None:
+                stopped_reason = budget.exceeded(explored_nodes, len(open_list), len(best_g))
+            if stopped_reason:
+                break
+            _, neg_g, _, state = heapq.heappop(open_list)
+            g = -neg_g
+            if g != best_g[state] or state in closed:
+                continue  # Stale entry
+            closed.add(state)
+            explored_nodes += 1
+
+            for direction, successor in state.get_successors():
+                new_g = g + 1
+                if new_g >= best_g.get(successor, math.inf):
+                    continue
+                best_g[successor] = new_g
+                node_of[successor] = nodes.add(node_of[state], direction)
+
+                if successor.is_goal():
+                    if new_g < best_cost:
+                        best_cost = new_g
+                        best_path = nodes.path(node_of[successor])
+                        improvements.append({
+                            "time": time.time() - start_time,
+                            "cost": new_g,
+                            "weight": weight,
+                            "explored_nodes": explored_nodes,
+                        })
+                        if on_solution is not None:
+                            on_solution(best_path, stats())
+                    continue
+
+                if successor not in h_of:
+                    h_of[successor] = successor.heuristic()
+                if successor in closed:
+                    inconsistent.append(successor)
+                else:
+                    counter += 1
+                    heapq.heappush(open_list, (new_g + weight * h_of[successor], -new_g, counter, successor))
+
+        if stopped_reason or weight <= 1:
+            break
+
+        # Lower the weight and re-key everything still open plus the reopened states
+        weight = max(1.0, weight - weight_step)
+        pending = {state for _, _, _, state in open_list}
+        pending.update(inconsistent)
+        open_list = []
+        for state in pending:
+            g = best_g[state]
+            counter += 1
+            open_list.append((g + weight * h_of[state], -g, counter, state))
+        heapq.heapify(open_list)
+        inconsistent = []
+        closed = set()
 
-    return None, {
-        "execution_time": time.time() - start_time, #Even if no solution is found return the time it took to compute
-        "explored_nodes": explored_nodes
-    }
+    return best_path, stats()
@@ -1,34 +1,241 @@
-from collections import deque
+import heapq
+import mmap
+import os
+import tempfile
 import time
+from sokoban_state import DIRECTIONS
+from solvers.state_keys import KeyTable, state_key, key_state, pack_key, unpack_key
+from solvers.stepping import PROGRESS_INTERVAL, drain, progress
 
-def bfs_solver(initial_state):
+NO_MOVE = 0xFFFF  # Move code of the start state
+
+def bfs_solver(initial_state, budget=None):
+    return drain(bfs_search(initial_state, budget))
+
+
+def bfs_search(initial_state, budget=None, progress_interval=PROGRESS_INTERVAL):
+    # Generator form of bfs_solver, see solvers/stepping.py.
+    # Layered breadth-first search that stores no state objects: the current and next layers are
+    # byte arrays of fixed-size packed keys (player cell + box mask) and a state is only rebuilt
+    # when it is expanded. visited is a flat hash table from each state's Zobrist hash to a move
+    # code, the direction (bits 0-1) plus for a push a flag (bit 2) and the cell the box was pushed
+    # to (bits 3+). That is enough to undo the move, so the path is unwound from the goal
     start_time = time.time()
+    next_progress = start_time + progress_interval
     explored_nodes = 0
-    visited = set()
-    queue = deque()
-
-    # The quese holds the current grid of the map and the path it took to get there
-    queue.append((initial_state, ""))
-    visited.add(hash(initial_state))
-
-    while queue:
-        state, path = queue.popleft()
-        explored_nodes += 1
-
-        if state.is_goal():
-            end_time = time.time()
-            return path, {
-                "execution_time": end_time - start_time,
-                "explored_nodes": explored_nodes
-            }
+    board = initial_state.board
+    record = ((1 << len(board.cells)) * len(board.cells)).bit_length() // 8 + 1
+    offsets = [dy * board.width + dx for dx, dy in DIRECTIONS.values()]
+    direction_codes = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+    def pack(state, box_mask):
+        # Push-level states are keyed by their player area, like their hash
+        player_index = board.index(*state.hash_player())
+        return pack_key(board, (player_index, box_mask)).to_bytes(record, "big")
+
+    def stats():
+        return {
+            "execution_time": time.time() - start_time,
+            "explored_nodes": explored_nodes
+        }
+
+    visited = KeyTable()
+    visited.add(initial_state.hash_key, NO_MOVE)
+    goal = initial_state if initial_state.is_goal() else None
+    layer = bytearray(pack(initial_state, initial_state.box_mask))
+    depth = 0
+
+    while layer and goal is None:
+        next_layer = bytearray()
+        for offset in range(0, len(layer), record):
+            player_index, box_mask = unpack_key(board, int.from_bytes(layer[offset:offset + record], "big"))
+            if budget is not None:
+                stopped_reason = budget.exceeded(explored_nodes, (len(layer) - offset + len(next_layer)) // record,
+                                                 len(visited))
+                if stopped_reason:
+                    yield "done", (None, dict(stats(), stopped_reason=stopped_reason))
+                    return
+            state = key_state(initial_state, (player_index, box_mask))
+            explored_nodes += 1
+            if time.time() >= next_progress:
+                yield progress(start_time, explored_nodes, (len(layer) - offset + len(next_layer)) // record,
+                               None, depth)
+                next_progress = time.time() + progress_interval
 
+            for move, successor in state.get_successors():
+                if successor.hash_key in visited:
+                    continue
+                successor_mask = successor.box_mask
+                code = direction_codes[move[-1]]
+                moved = successor_mask & ~box_mask
+                if moved:
+                    code |= 4 | (moved.bit_length() - 1) << 3
+                visited.add(successor.hash_key, code)
+                if successor.is_goal():
+                    goal = successor
+                    break
+                next_layer += pack(successor, successor_mask)
+            if goal is not None:
+                break
+        layer = next_layer
+        depth += 1
+
+    if goal is None:
+        yield "done", (None, stats())
+        return
+
+    chain = [goal]
+    while visited.get(chain[-1].hash_key) != NO_MOVE:
+        code = visited.get(chain[-1].hash_key)
+        player_index, box_mask = state_key(chain[-1])
+        offset = offsets[code & 3]
+        if code & 4:
+            box = code >> 3
+            box_mask ^= 1 << box | 1 << box - offset
+            player_index = box - 2 * offset  # Where the player stood to push
+        else:
+            player_index -= offset
+        chain.append(key_state(initial_state, (player_index, box_mask)))
+
+    # Replay from the start, the real player position gives the moves (and walks) between the states
+    path = ""
+    state = initial_state
+    for target in reversed(chain[:-1]):
         for move, successor in state.get_successors():
-            h = hash(successor)
-            if h not in visited:
-                visited.add(h)
-                queue.append((successor, path + move))
-
-    return None, {
-        "execution_time": time.time() - start_time,
-        "explored_nodes": explored_nodes
-    }
+            if successor == target:
+                path += move
+                state = successor
+                break
+    yield "done", (path, stats())
+
+
+EXTERNAL_CHUNK = 1 << 16  # Successor keys buffered in memory before they are written as a sorted run
+
+def external_bfs_solver(initial_state, directory=None, chunk_size=EXTERNAL_CHUNK, budget=None):
+    # Breadth-first search with the frontier layers and the visited set on disk (Korf-style delayed
+    # duplicate detection). Every file is a sorted array of fixed-size big-endian packed keys, read
+    # back through mmap. Expanding a layer writes its successors as sorted runs of chunk_size keys,
+    # then one merge of the runs against the visited file yields the next layer and the new visited
+    # file. Memory holds one chunk, the disk holds the layers so the path can be traced back
+    start_time = time.time()
+    board = initial_state.board
+    record = ((1 << len(board.cells)) * len(board.cells)).bit_length() // 8 + 1
+    explored_nodes = 0
+
+    def pack(state):
+        # Push-level states are keyed by their player area, like their hash
+        return pack_key(board, state_key(state, state.hash_player())).to_bytes(record, "big")
+
+    def unpack(data):
+        return key_state(initial_state, unpack_key(board, int.from_bytes(data, "big")))
+
+    def read(path):
+        if os.path.getsize(path) == 0:
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset in range(0, len(data), record):
+                yield data[offset:offset + record]
+
+    def write(path, keys):
+        with open(path, "wb") as f:
+            for key in keys:
+                f.write(key)
+
+    def merge_layer(runs, visited_path, layer_path, new_visited_path):
+        # Unique run keys that are not in the visited file become the next layer,
+        # and both are merged into the new visited file. Returns the layer size
+        size = 0
+        previous = None
+        with open(layer_path, "wb") as layer, open(new_visited_path, "wb") as new_visited:
+            visited = read(visited_path)
+            seen = next(visited, None)
+            for key in heapq.merge(*(read(run) for run in runs)):
+                if key == previous:
+                    continue
+                previous = key
+                while seen is not None and seen < key:
+                    new_visited.write(seen)
+                    seen = next(visited, None)
+                if key != seen:
+                    layer.write(key)
+                    new_visited.write(key)
+                    size += 1
+            while seen is not None:
+                new_visited.write(seen)
+                seen = next(visited, None)
+        return size
+
+    with tempfile.TemporaryDirectory(dir=directory) as work:
+        def stats():
+            return {
+                "execution_time": time.time() - start_time,
+                "explored_nodes": explored_nodes,
+                "layers": len(layers)
+            }
+
+        layers = [os.path.join(work, "layer0")]
+        visited_path = os.path.join(work, "visited0")
+        write(layers[0], [pack(initial_state)])
+        write(visited_path, [pack(initial_state)])
+        chain = [pack(initial_state)] if initial_state.is_goal() else None
+        runs = []
+        buffer = []
+
+        def flush():
+            runs.append(os.path.join(work, f"run{len(runs)}"))
+            write(runs[-1], sorted(set(buffer)))
+            buffer.clear()
+
+        stopped_reason = None
+        while chain is None:
+            depth = len(layers) - 1
+            for data in read(layers[depth]):
+                if budget is not None:
+                    # Only the run buffer is in memory, the layers and the visited set are on disk
+                    stopped_reason = budget.exceeded(explored_nodes, len(buffer))
+                    if stopped_reason:
+                        break  # Leave the loop first so the layer's mmap is closed
+                explored_nodes += 1
+                for _, successor in unpack(data).get_successors():
+                    if successor.is_goal():
+                        chain = [pack(successor), data]
+                        break
+                    buffer.append(pack(successor))
+                    if len(buffer) >= chunk_size:
+                        flush()
+                if chain is not None:
+                    break
+            if chain is not None:
+                break
+            if stopped_reason:
+                return None, dict(stats(), stopped_reason=stopped_reason)
+            flush()
+
+            layers.append(os.path.join(work, f"layer{depth + 1}"))
+            new_visited_path = os.path.join(work, f"visited{depth + 1}")
+            size = merge_layer(runs, visited_path, layers[-1], new_visited_path)
+            for path in runs + [visited_path]:
+                os.remove(path)
+            runs.clear()
+            visited_path = new_visited_path
+            if size == 0:
+                return None, stats()
+
+        # Walk back through the layers: the parent of a key is any key in the layer before it that
+        # has it as a successor. Then replay the key chain from the start to get the moves
+        for depth in range(len(layers) - 2, -1, -1):
+            target = chain[-1]
+            for data in read(layers[depth]):
+                if any(pack(successor) == target for _, successor in unpack(data).get_successors()):
+                    chain.append(data)
+                    break
+
+        path = ""
+        state = initial_state
+        for key in reversed(chain[:-1]):
+            for move, successor in state.get_successors():
+                if pack(successor) == key:
+                    path += move
+                    state = successor
+                    break
+        return path, stats()
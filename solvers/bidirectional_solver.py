@@ -0,0 +1,119 @@
+import time
+from sokoban_state import SokobanState, PushState, walk_path
+from solvers.search_nodes import NodeStore
+
+def bidirectional_solver(initial_state, budget=None):
+    # Push-level BFS from the initial position and pull-level BFS from the solved positions
+    # (all boxes on goals, player in any of the areas left free), one layer at a time on the
+    # smaller frontier, until both sides reach the same canonical position
+    start_time = time.time()
+    board = initial_state.board
+    forward_start = initial_state if isinstance(initial_state, PushState) else PushState.from_state(initial_state)
+
+    # Forward side: state -> node in the path store, forward_states[node] is the state itself
+    forward_nodes = NodeStore()
+    forward_visited = {forward_start: forward_nodes.root()}
+    forward_states = [forward_start]
+    forward_frontier = [forward_start]
+
+    # Backward side: state -> index into (parent index, push direction, state)
+    backward_parents = []
+    backward_moves = []
+    backward_states = []
+    backward_visited = {}
+    covered = set()
+    for cell in board.floor:
+        if cell in board.goals or cell in covered:
+            continue
+        goal_state = PushState.from_state(SokobanState.from_parts(board, cell, board.goals))
+        covered.update(goal_state.reachable())
+        if goal_state not in backward_visited:
+            backward_visited[goal_state] = len(backward_states)
+            backward_parents.append(-1)
+            backward_moves.append("")
+            backward_states.append(goal_state)
+    backward_frontier = list(backward_states)
+
+    forward_expanded = 0
+    backward_expanded = 0
+
+    def stats(**extra):
+        return dict({
+            "execution_time": time.time() - start_time,
+            "explored_nodes": forward_expanded + backward_expanded,
+            "forward_nodes": forward_expanded,
+            "backward_nodes": backward_expanded,
+        }, **extra)
+
+    def exceeded():
+        # Expansions, frontiers and visited sets of both sides together
+        return budget.exceeded(forward_expanded + backward_expanded,
+                               len(forward_frontier) + len(backward_frontier),
+                               len(forward_visited) + len(backward_visited))
+
+    def solution(forward_state, backward_state):
+        # Forward moves to the meeting point, then replay the backward chain as pushes,
+        # walking to each pushing position in between
+        path = forward_nodes.path(forward_visited[forward_state])
+        player = forward_state.player
+        index = backward_visited[backward_state]
+        while backward_parents[index] >= 0:
+            state = backward_states[index]
+            walker = SokobanState.from_parts(board, player, state.boxes)
+            path += walk_path(walker.reachable(), state.player) + backward_moves[index]
+            next_state = backward_states[backward_parents[index]]
+            player = next(iter(state.boxes - next_state.boxes))  # The player ends where the box was
+            index = backward_parents[index]
+        return path
+
+    meeting = None  # (forward state, backward state) of the same canonical position
+    if forward_start in backward_visited:
+        meeting = (forward_start, backward_states[backward_visited[forward_start]])
+
+    while meeting is None and forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            next_frontier = []
+            for state in forward_frontier:
+                stopped_reason = budget and exceeded()
+                if stopped_reason:
+                    return None, stats(stopped_reason=stopped_reason)
+                forward_expanded += 1
+                node = forward_visited[state]
+                for move, successor in state.get_successors():
+                    if successor in forward_visited:
+                        continue
+                    forward_visited[successor] = forward_nodes.add(node, move)
+                    forward_states.append(successor)
+                    if successor in backward_visited:
+                        meeting = (successor, backward_states[backward_visited[successor]])
+                        break
+                    next_frontier.append(successor)
+                if meeting is not None:
+                    break
+            forward_frontier = next_frontier
+        else:
+            next_frontier = []
+            for state in backward_frontier:
+                stopped_reason = budget and exceeded()
+                if stopped_reason:
+                    return None, stats(stopped_reason=stopped_reason)
+                backward_expanded += 1
+                index = backward_visited[state]
+                for move, predecessor in state.get_predecessors():
+                    if predecessor in backward_visited:
+                        continue
+                    backward_visited[predecessor] = len(backward_states)
+                    backward_parents.append(index)
+                    backward_moves.append(move)
+                    backward_states.append(predecessor)
+                    if predecessor in forward_visited:
+                        meeting = (forward_states[forward_visited[predecessor]], predecessor)
+                        break
+                    next_frontier.append(predecessor)
+                if meeting is not None:
+                    break
+            backward_frontier = next_frontier
+
+    if meeting is None:
+        return None, stats()
+    return solution(*meeting), stats()
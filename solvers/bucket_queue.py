@@ -0,0 +1,46 @@
+class BucketQueue:
+    # Two-level bucket queue for integer priorities. buckets[f][g] is a stack of items, pop returns
+    # an item with the lowest f and, among those, the highest g (deepest first, LIFO after that).
+    # No item is ever compared, and push/pop are O(1) amortized since the minimum f only moves
+    # back when an item with a lower f is pushed
+    def __init__(self):
+        self.buckets = []
+        self.max_g = []  # Highest possibly non-empty g per f bucket
+        self.min_f = 0
+        self.size = 0
+
+    def push(self, f, g, item):
+        while len(self.buckets) <= f:
+            self.buckets.append([])
+            self.max_g.append(-1)
+        bucket = self.buckets[f]
+        while len(bucket) <= g:
+            bucket.append([])
+        bucket[g].append(item)
+        if g > self.max_g[f]:
+            self.max_g[f] = g
+        if f < self.min_f:
+            self.min_f = f
+        self.size += 1
+
+    def pop(self):
+        # Returns (f, g, item) for the best entry
+        if not self.size:
+            raise IndexError("pop from an empty BucketQueue")
+        while True:
+            f = self.min_f
+            bucket = self.buckets[f]
+            g = self.max_g[f]
+            while g >= 0 and not bucket[g]:
+                g -= 1
+            self.max_g[f] = g
+            if g >= 0:
+                self.size -= 1
+                return f, g, bucket[g].pop()
+            self.min_f += 1
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
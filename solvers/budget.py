@@ -0,0 +1,43 @@
+import time
+
+BYTES_PER_STATE = 256  # Rough size of one stored state with its bookkeeping, for the memory estimate
+
+
+class SearchBudget:
+    # Limits for a solver run, shared by every solver that is handed the same object. Solvers call
+    # exceeded() once per expansion and stop with their partial stats and stopped_reason when it
+    # returns a reason. The clock starts when the budget is created, and cancel() may be called
+    # from another thread (e.g. the GUI) to stop the search early. Any limit left as None is off.
+    # The counts from the latest check stay readable as progress while the solver runs
+    def __init__(self, max_time=None, max_expansions=None, max_memory=None, bytes_per_state=BYTES_PER_STATE):
+        self.max_time = max_time
+        self.max_expansions = max_expansions
+        self.max_memory = max_memory  # Bytes, estimated from the frontier and visited sizes
+        self.bytes_per_state = bytes_per_state
+        self.start_time = time.time()
+        self.cancelled = False
+        self.expansions = 0
+        self.frontier_size = 0
+        self.visited_size = 0
+
+    def cancel(self):
+        self.cancelled = True
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def exceeded(self, expansions, frontier_size=0, visited_size=0):
+        # Reason to stop ("cancelled", "time", "expansions" or "memory"), or None to go on
+        self.expansions = expansions
+        self.frontier_size = frontier_size
+        self.visited_size = visited_size
+        if self.cancelled:
+            return "cancelled"
+        if self.max_time is not None and self.elapsed() >= self.max_time:
+            return "time"
+        if self.max_expansions is not None and expansions >= self.max_expansions:
+            return "expansions"
+        if (self.max_memory is not None and
+                (frontier_size + visited_size) * self.bytes_per_state >= self.max_memory):
+            return "memory"
+        return None
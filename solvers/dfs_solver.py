@@ -1,35 +1,119 @@
 import time
+from solvers.search_nodes import NodeStore
+from solvers.stepping import PROGRESS_INTERVAL, drain, progress
 
-def dfs_solver(initial_state, max_depth=1000):
+def dfs_solver(initial_state, max_depth=1000, budget=None):
+    return drain(dfs_search(initial_state, max_depth, budget))
+
+
+def dfs_search(initial_state, max_depth=1000, budget=None, progress_interval=PROGRESS_INTERVAL):
+    # Generator form of dfs_solver, see solvers/stepping.py
     start_time = time.time()
+    next_progress = start_time + progress_interval
     explored_nodes = 0
     visited = set()
-    stack = [(initial_state, "")]
+    nodes = NodeStore()
+    stack = [(initial_state, nodes.root(), 0)]  # state, path node, path length
 
     while stack:
-        state, path = stack.pop()
+        state, node, depth = stack.pop()
 
         if state.is_goal():
             end_time = time.time()
-            return path, {
+            yield "done", (nodes.path(node), {
                 "execution_time": end_time - start_time,
                 "explored_nodes": explored_nodes,
-            }
+            })
+            return
 
-        if len(path) > max_depth:
+        if depth > max_depth:
             continue  #no infinite search
 
         state_hash = hash(state)
         if state_hash in visited:
             continue
 
+        if budget is not None:
+            stopped_reason = budget.exceeded(explored_nodes, len(stack), len(visited))
+            if stopped_reason:
+                yield "done", (None, {
+                    "execution_time": time.time() - start_time,
+                    "explored_nodes": explored_nodes,
+                    "stopped_reason": stopped_reason
+                })
+                return
+
         visited.add(state_hash)
         explored_nodes += 1
+        if time.time() >= next_progress:
+            yield progress(start_time, explored_nodes, len(stack), None, depth)
+            next_progress = time.time() + progress_interval
 
         for move, successor in reversed(state.get_successors()):
-            stack.append((successor, path + move))
+            stack.append((successor, nodes.add(node, move), depth + len(move)))
 
-    return None, {
+    yield "done", (None, {
         "execution_time": time.time() - start_time,
         "explored_nodes": explored_nodes
-    }
+    })
+
+
+def iddfs_solver(initial_state, max_depth=1000, budget=None):
+    # Iterative deepening DFS. Each iteration is a depth-first search up to depth_limit with a
+    # transposition table of the shallowest depth each state was reached at in this iteration,
+    # so a state is expanded again only from a shorter path. The limit then grows by step,
+    # which doubles whenever an iteration costs less than twice the one before it, so cheap
+    # shallow iterations are skipped quickly and the limit stays close to the solution depth
+    start_time = time.time()
+    explored_nodes = 0
+    iterations = 0
+    depth_limit = 1
+    step = 1
+    previous_nodes = 0
+
+    def stats(**extra):
+        return dict({
+            "execution_time": time.time() - start_time,
+            "explored_nodes": explored_nodes,
+            "iterations": iterations,
+            "depth_limit": depth_limit
+        }, **extra)
+
+    while True:
+        iterations += 1
+        iteration_start = explored_nodes
+        cut_off = False
+        shallowest = {}  # state hash -> shallowest depth it was expanded at this iteration
+        nodes = NodeStore()
+        stack = [(initial_state, nodes.root(), 0)]
+
+        while stack:
+            state, node, depth = stack.pop()
+
+            if state.is_goal():
+                return nodes.path(node), stats()
+
+            state_hash = hash(state)
+            known = shallowest.get(state_hash)
+            if known is not None and known <= depth:
+                continue
+            if budget is not None:
+                stopped_reason = budget.exceeded(explored_nodes, len(stack), len(shallowest))
+                if stopped_reason:
+                    return None, stats(stopped_reason=stopped_reason)
+            shallowest[state_hash] = depth
+            explored_nodes += 1
+
+            for move, successor in reversed(state.get_successors()):
+                if depth + len(move) > depth_limit:
+                    cut_off = True  # A deeper iteration has something left to explore
+                    continue
+                stack.append((successor, nodes.add(node, move), depth + len(move)))
+
+        if not cut_off or depth_limit >= max_depth:
+            return None, stats()
+        iteration_nodes = explored_nodes - iteration_start
+        if iteration_nodes < 2 * previous_nodes:
+            step *= 2
+        previous_nodes = iteration_nodes
+        depth_limit = min(depth_limit + step, max_depth)
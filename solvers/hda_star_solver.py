@@ -0,0 +1,230 @@
+import math
+import multiprocessing
+import os
+import queue
+import time
+from solvers.astar_solver import F_SCALE
+from solvers.bucket_queue import BucketQueue
+from solvers.state_keys import state_key, key_state
+
+BATCH_SIZE = 64  # Expansions between two flushes of the outgoing batches
+PROBE_INTERVAL = 0.05  # Seconds between termination probes
+
+
+def _worker(worker_id, initial_state, inboxes, results):
+    # One HDA* worker: owns the states with hash_key % workers == worker_id and runs A* on them.
+    # Successors owned by other workers are buffered and sent as ("states", batch) messages
+    num_workers = len(inboxes)
+    inbox = inboxes[worker_id]
+    open_list = BucketQueue()
+    best_g = {}
+    parent_of = {}  # state key -> (state key of the parent or None, move)
+    outgoing = [[] for _ in range(num_workers)]
+    bound = math.inf  # Cost of the best solution found by any worker
+    expanded = sent = received = 0
+    messaging_time = 0.0
+
+    def add(state, g, parent_key, move):
+        nonlocal bound
+        # Workers do not expand in one global f order, so a state can turn up again with a lower g
+        # after it was expanded, it is then reopened
+        if g >= bound:
+            return
+        known_g = best_g.get(state)
+        if known_g is not None and known_g <= g:
+            return
+        best_g[state] = g
+        key = state_key(state)  # The exact player cell, push moves depend on where the player stands
+        parent_of[key] = (parent_key, move)
+        if state.is_goal():
+            bound = g
+            results.put(("goal", worker_id, g, key))
+            return
+        f = g + state.heuristic()
+        if f == math.inf:
+            return
+        # heuristic() orders the search, but its extra weights can overestimate, so the incumbent
+        # only prunes on g plus the box-goal assignment cost, which never does
+        lower_bound = g + sum(state.assignment().costs())
+        if lower_bound < bound:
+            open_list.push(round(f * F_SCALE), g, (state, lower_bound))
+
+    def flush():
+        nonlocal sent, messaging_time
+        start = time.time()
+        for owner, batch in enumerate(outgoing):
+            if batch:
+                inboxes[owner].put(("states", batch))
+                outgoing[owner] = []  # The queue pickles the batch later, so never reuse the list
+                sent += 1
+        messaging_time += time.time() - start
+
+    def trace(key):
+        # Follow the parent chain while it stays on this worker, moves come back goal first
+        moves = []
+        while key is not None:
+            if key_state(initial_state, key).hash_key % num_workers != worker_id:
+                break
+            key, move = parent_of[key]
+            moves.append(move)
+        return moves, key
+
+    if initial_state.hash_key % num_workers == worker_id:
+        add(initial_state, 0, None, "")
+
+    while True:
+        # Handle every waiting message first, blocking briefly only when there is nothing to expand
+        while True:
+            start = time.time()
+            try:
+                message = inbox.get_nowait() if open_list else inbox.get(timeout=PROBE_INTERVAL)
+            except queue.Empty:
+                messaging_time += time.time() - start
+                break
+            kind = message[0]
+            if kind == "states":
+                received += 1
+                for player_index, box_mask, g, parent_key, move in message[1]:
+                    add(key_state(initial_state, (player_index, box_mask)), g, parent_key, move)
+                messaging_time += time.time() - start
+            elif kind == "bound":
+                bound = min(bound, message[1])
+            elif kind == "probe":
+                flush()
+                results.put(("status", worker_id, message[1], not open_list, sent, received,
+                             expanded, len(open_list), len(best_g)))
+            elif kind == "trace":
+                results.put(("trace", trace(message[1])))
+            elif kind == "stop":
+                results.put(("stats", worker_id, expanded, messaging_time))
+                return
+
+        for _ in range(BATCH_SIZE):
+            if not open_list:
+                break
+            _, g, (state, lower_bound) = open_list.pop()
+            if g > best_g[state] or lower_bound >= bound:
+                continue  # Superseded by a lower g, or cannot beat the best solution
+            expanded += 1
+
+            parent_key = state_key(state)
+            new_g = g + 1
+            for move, successor in state.get_successors():
+                owner = successor.hash_key % num_workers
+                if owner == worker_id:
+                    add(successor, new_g, parent_key, move)
+                elif new_g < bound:
+                    outgoing[owner].append((*state_key(successor), new_g, parent_key, move))
+        flush()
+
+
+def hda_star_solver(initial_state, num_workers=None, budget=None):
+    # Hash-distributed A*: one worker process per core, each with its own open and closed lists
+    # for the states it owns. A goal only sets the incumbent cost. The search ends when two
+    # probe rounds in a row find every worker without open states that could still beat the
+    # incumbent and the same number of batches sent and received, so no work is left anywhere
+    # or in flight and the incumbent is optimal. A budget is checked against the counts the
+    # workers report with each probe, and stops the search without a path
+    start_time = time.time()
+    num_workers = num_workers or os.cpu_count() or 1
+    inboxes = [multiprocessing.Queue() for _ in range(num_workers)]
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_worker, args=(i, initial_state, inboxes, results), daemon=True)
+               for i in range(num_workers)]
+    for worker in workers:
+        worker.start()
+
+    def broadcast(message):
+        for inbox in inboxes:
+            inbox.put(message)
+
+    def next_message(timeout=PROBE_INTERVAL):
+        try:
+            return results.get(timeout=timeout)
+        except queue.Empty:
+            if not all(worker.is_alive() for worker in workers):
+                broadcast(("stop",))
+                raise RuntimeError("An HDA* worker exited unexpectedly")
+            return None
+
+    incumbent = math.inf
+    goal_key = None
+    probe = 0
+    probe_time = 0
+    replies = None  # worker -> (idle, sent, received) for the current probe, None when no probe is out
+    previous = None
+    progress = {}  # worker -> (expanded, open states, stored states) from its latest status
+    stopped_reason = None
+    while True:
+        if budget is not None:
+            stopped_reason = budget.exceeded(sum(counts[0] for counts in progress.values()),
+                                             sum(counts[1] for counts in progress.values()),
+                                             sum(counts[2] for counts in progress.values()))
+            if stopped_reason:
+                break
+        if replies is None and time.time() - probe_time >= PROBE_INTERVAL:
+            probe += 1
+            probe_time = time.time()
+            replies = {}
+            broadcast(("probe", probe))
+        message = next_message()
+        if message is None:
+            continue
+        kind = message[0]
+        if kind == "goal":
+            _, _, g, key = message
+            if g < incumbent:
+                incumbent, goal_key = g, key
+                broadcast(("bound", g))
+        elif kind == "status":
+            _, worker_id, reply_probe, idle, sent, received, expanded, frontier, stored = message
+            progress[worker_id] = (expanded, frontier, stored)
+            if reply_probe != probe:
+                continue
+            replies[worker_id] = (idle, sent, received)
+            if len(replies) == num_workers:
+                snapshot = (all(reply[0] for reply in replies.values()),
+                            sum(reply[1] for reply in replies.values()),
+                            sum(reply[2] for reply in replies.values()))
+                if snapshot[0] and snapshot[1] == snapshot[2] and snapshot == previous:
+                    break
+                previous = snapshot
+                replies = None
+
+    # Walk the parent chain back from the goal, asking each owner for its part of it
+    path = None
+    if goal_key is not None and not stopped_reason:
+        moves = []
+        key = goal_key
+        while key is not None:
+            inboxes[key_state(initial_state, key).hash_key % num_workers].put(("trace", key))
+            message = next_message()
+            while message is None or message[0] != "trace":
+                message = next_message()
+            part, key = message[1]
+            moves.extend(part)
+        path = ''.join(reversed(moves))
+
+    broadcast(("stop",))
+    worker_expansions = [0] * num_workers
+    messaging_time = [0.0] * num_workers
+    remaining = num_workers
+    while remaining:
+        message = results.get()
+        if message[0] == "stats":
+            _, worker_id, expanded, seconds = message
+            worker_expansions[worker_id] = expanded
+            messaging_time[worker_id] = seconds
+            remaining -= 1
+    for worker in workers:
+        worker.join()
+
+    stats = {
+        "execution_time": time.time() - start_time,
+        "explored_nodes": sum(worker_expansions),
+        "worker_expansions": worker_expansions,
+        "messaging_time": messaging_time
+    }
+    if stopped_reason:
+        stats["stopped_reason"] = stopped_reason
+    return path, stats
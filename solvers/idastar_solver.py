@@ -0,0 +1,83 @@
+import math
+import time
+
+def idastar_solver(initial_state, table_size=1 << 20, budget=None):
+    # Iterative deepening on f = g + heuristic(). Memory stays flat: only the current path is kept,
+    # plus a fixed-size transposition table (key, g, iteration) indexed by hash % table_size that
+    # prunes states already reached this iteration with an equal or lower g
+    start_time = time.time()
+    explored_nodes = 0
+    re_expanded_nodes = 0
+    iterations = 0
+
+    table_keys = [0] * table_size
+    table_g = [0] * table_size
+    table_iteration = [0] * table_size
+
+    bound = initial_state.heuristic()
+    previous_bound = -1
+
+    def stats(**extra):
+        return dict({
+            "execution_time": time.time() - start_time,
+            "explored_nodes": explored_nodes,
+            "iterations": iterations,
+            "re_expanded_nodes": re_expanded_nodes,
+        }, **extra)
+
+    while bound < math.inf:
+        iterations += 1
+        next_bound = math.inf
+
+        # Each frame: [state, g, move that reached it, children sorted by f, next child index]
+        stack = [[initial_state, 0, "", None, 0]]
+        while stack:
+            frame = stack[-1]
+            state, g, _, children, index = frame
+
+            if children is None:
+                if state.is_goal():
+                    path = ''.join(f[2] for f in stack)
+                    return path, stats()
+
+                key = hash(state)
+                slot = key % table_size
+                seen_this_iteration = table_iteration[slot] == iterations and table_keys[slot] == key
+                if seen_this_iteration and table_g[slot] <= g:
+                    stack.pop()  # Reached before in this iteration by a path at least as short
+                    continue
+                if budget is not None:
+                    # The table has a fixed size, only the path on the stack grows
+                    stopped_reason = budget.exceeded(explored_nodes, len(stack))
+                    if stopped_reason:
+                        return None, stats(stopped_reason=stopped_reason)
+                table_keys[slot] = key
+                table_g[slot] = g
+                table_iteration[slot] = iterations
+
+                # Re-expansion: reached again by a shorter path, or already expanded by the previous iteration
+                explored_nodes += 1
+                if seen_this_iteration or g + state.heuristic() <= previous_bound:
+                    re_expanded_nodes += 1
+
+                children = []
+                for move, successor in state.get_successors():
+                    f = g + 1 + successor.heuristic()
+                    if f > bound:
+                        next_bound = min(next_bound, f)
+                    else:
+                        children.append((f, len(children), move, successor))
+                children.sort()
+                frame[3] = children
+
+            if index < len(children):
+                frame[4] = index + 1
+                _, _, move, successor = children[index]
+                stack.append([successor, g + 1, move, None, 0])
+            else:
+                stack.pop()
+
+        previous_bound = bound
+        bound = next_bound
+
+    return None, stats()
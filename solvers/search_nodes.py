@@ -0,0 +1,36 @@
+from array import array
+
+
+class NodeStore:
+    # Shared path storage for the solvers. Every search node is an index into flat arrays holding its
+    # parent and the move byte that reached it, so frontier entries carry an int instead of a copy of
+    # the whole path string. Multi-character moves (push-level walks) are kept aside by node index
+    def __init__(self):
+        self.parents = array('l')
+        self.moves = bytearray()
+        self.long_moves = {}
+
+    def add(self, parent, move):
+        node = len(self.moves)
+        self.parents.append(parent)
+        if len(move) == 1:
+            self.moves.append(ord(move))
+        else:
+            self.moves.append(0)
+            self.long_moves[node] = move
+        return node
+
+    def root(self):
+        return self.add(-1, "")
+
+    def path(self, node):
+        # Single pass from the node back to the root, then reversed into the move string
+        moves = []
+        while self.parents[node] >= 0:
+            move = self.moves[node]
+            moves.append(chr(move) if move else self.long_moves[node])
+            node = self.parents[node]
+        return ''.join(reversed(moves))
+
+    def __len__(self):
+        return len(self.moves)
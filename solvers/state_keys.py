@@ -0,0 +1,79 @@
+from array import array
+from sokoban_state import SokobanState
+
+# Compact state keys for solvers that keep many states around or send them between processes:
+# (player cell index, box bitmask) as a tuple, or packed into one int
+
+
+def state_key(state, player=None):
+    # player defaults to the real position, pass hash_player() to key push-level states by area
+    if player is not None:
+        return state.board.index(*player), state.box_mask
+    return state.player_index, state.box_mask
+
+
+def key_state(template, key):
+    # State of the same class as template (and on its board) for a key
+    board = template.board
+    player_index, box_mask = key
+    if hasattr(type(template), "from_key"):
+        return type(template).from_key(board, player_index, box_mask)
+    state = SokobanState.from_parts(board, board.cells[player_index], board.from_mask(box_mask))
+    if type(template) is SokobanState:
+        return state
+    return type(template).from_state(state)
+
+
+def pack_key(board, key):
+    player_index, box_mask = key
+    return box_mask * len(board.cells) + player_index
+
+
+def unpack_key(board, packed):
+    box_mask, player_index = divmod(packed, len(board.cells))
+    return player_index, box_mask
+
+
+class KeyTable:
+    # Set of 64-bit Zobrist hashes with a small code (< 65535) for each, kept in two flat arrays
+    # (10 bytes per slot) instead of Python ints in a dict. Open addressing with linear probing;
+    # the Zobrist bits are uniform, so the low bits pick the slot and 0 marks a free one
+    def __init__(self, capacity=1 << 16):
+        self.keys = array('Q', bytes(8 * capacity))
+        self.codes = array('H', bytes(2 * capacity))
+        self.size = 0
+
+    def _slot(self, key):
+        keys = self.keys
+        mask = len(keys) - 1
+        i = key & mask
+        while keys[i] and keys[i] != key:
+            i = (i + 1) & mask
+        return i
+
+    def get(self, key, default=None):
+        i = self._slot(key or 1)
+        return self.codes[i] if self.keys[i] else default
+
+    def add(self, key, code):
+        key = key or 1
+        if 2 * (self.size + 1) > len(self.keys):
+            old_keys, old_codes = self.keys, self.codes
+            self.keys = array('Q', bytes(16 * len(old_keys)))
+            self.codes = array('H', bytes(4 * len(old_keys)))
+            for old_key, old_code in zip(old_keys, old_codes):
+                if old_key:
+                    i = self._slot(old_key)
+                    self.keys[i] = old_key
+                    self.codes[i] = old_code
+        i = self._slot(key)
+        if not self.keys[i]:
+            self.size += 1
+        self.keys[i] = key
+        self.codes[i] = code
+
+    def __contains__(self, key):
+        return bool(self.keys[self._slot(key or 1)])
+
+    def __len__(self):
+        return self.size
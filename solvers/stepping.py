@@ -0,0 +1,47 @@
+import time
+
+PROGRESS_INTERVAL = 0.005  # Seconds between two progress snapshots, well under one 60 fps frame
+
+# Search generators (astar_search, bfs_search, dfs_search) yield ("progress", snapshot) every
+# progress_interval seconds and end with ("done", (path, stats)), so a caller can advance a
+# search a slice at a time without threads. The *_solver functions just drain them
+
+
+def progress(start_time, expansions, frontier_size, best_f, depth):
+    return "progress", {
+        "elapsed": time.time() - start_time,
+        "expansions": expansions,
+        "frontier_size": frontier_size,
+        "best_f": best_f,
+        "depth": depth,
+    }
+
+
+def drain(search):
+    # Run a search to the end and return its (path, stats)
+    for kind, value in search:
+        if kind == "done":
+            return value
+
+
+class SearchStepper:
+    # Advances a search generator in time slices, e.g. one per frame of a game loop, and keeps
+    # its last (kind, value) so the result stays readable once the search has finished
+    def __init__(self, search):
+        self.search = search
+        self.last = None
+
+    def done(self):
+        return self.last is not None and self.last[0] == "done"
+
+    def run_for(self, seconds):
+        # Run for about the given time (the slice ends at the first snapshot past it, so it
+        # overshoots by at most the search's progress_interval) and return the last (kind, value)
+        if self.done():
+            return self.last
+        deadline = time.time() + seconds
+        for item in self.search:
+            self.last = item
+            if item[0] == "done" or time.time() >= deadline:
+                break
+        return self.last
@@ -3,12 +3,15 @@ from state_display import *
 from you_win import you_win
 
 def run_game(initial_state,
-             astar_solution, astar_stats,
-             bfs_solution, bfs_stats,
-             dfs_solution, dfs_stats,
-             theme):
+             astar_solution=None, astar_stats=None,
+             bfs_solution=None, bfs_stats=None,
+             dfs_solution=None, dfs_stats=None,
+             theme="blue", portfolio=None):
+    # With a running portfolio the solutions start out missing and are filled in as each solver
+    # finishes, a button only plays (or reports failure) once its solver has reported
     current_stats = None
     ai_failed_to_solve = False
+    failure_message = ""
 
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -41,10 +44,23 @@ def run_game(initial_state,
     animation_delay = base_ai_delay
 
 
+    def pending(name):
+        return portfolio is not None and name not in portfolio.results
+
+    def failure_text(name, stats):
+        # Only a search that ran to the end proves the level unsolvable
+        if stats and stats.get("timed_out"):
+            return f"{name} timed out!"
+        if stats and "exit_code" in stats:
+            return f"{name} solver failed!"
+        if stats and stats.get("stopped_reason"):
+            return f"{name} stopped early ({stats['stopped_reason']})!"
+        return "Can't be solved!"
+
     def draw_buttons():
         for text, rect in buttons.items():
-            pygame.draw.rect(screen, (180, 180, 180), rect)
-            label = font.render(text, True, (0, 0, 0))
+            pygame.draw.rect(screen, (180, 180, 180) if not pending(text) else (110, 110, 110), rect)
+            label = font.render(text if not pending(text) else text + "...", True, (0, 0, 0))
             screen.blit(label, (rect.x + 10, rect.y + 10))
         # Draw Speed Button
         pygame.draw.rect(screen, (140, 100, 200), speed_button_rect)
@@ -92,6 +108,15 @@ def run_game(initial_state,
         dt = clock.tick(60)
         animation_timer += dt
 
+        if portfolio is not None:
+            for name, solution, stats in portfolio.poll():
+                if name == "A*":
+                    astar_solution, astar_stats = solution, stats
+                elif name == "BFS":
+                    bfs_solution, bfs_stats = solution, stats
+                elif name == "DFS":
+                    dfs_solution, dfs_stats = solution, stats
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
@@ -102,7 +127,7 @@ def run_game(initial_state,
                     if event.key == pygame.K_ESCAPE:
                         running = False
                     elif event.key == pygame.K_r:  # Reset game
-                        return run_game(initial_state, astar_solution, astar_stats, bfs_solution, bfs_stats, dfs_solution, dfs_stats,theme)
+                        return run_game(initial_state, astar_solution, astar_stats, bfs_solution, bfs_stats, dfs_solution, dfs_stats,theme, portfolio)
                         # current_state = initial_state
                         # animation_running = False
                         # animation_solution = ""
@@ -122,9 +147,10 @@ def run_game(initial_state,
                     ai_speed_fast = not ai_speed_fast
                     animation_delay = base_ai_delay // 2 if ai_speed_fast else base_ai_delay
 
-                if buttons["A*"].collidepoint(event.pos):
+                if buttons["A*"].collidepoint(event.pos) and not pending("A*"):
                     if astar_solution is None:
                         ai_failed_to_solve = True
+                        failure_message = failure_text("A*", astar_stats)
                     else:
                         current_stats = astar_stats
                         animation_solution = astar_solution
@@ -134,9 +160,10 @@ def run_game(initial_state,
                         animation_timer = 0
                         ai_failed_to_solve = False
 
-                elif buttons["BFS"].collidepoint(event.pos):
+                elif buttons["BFS"].collidepoint(event.pos) and not pending("BFS"):
                     if bfs_solution is None:
                         ai_failed_to_solve = True
+                        failure_message = failure_text("BFS", bfs_stats)
                     else:
                         current_stats = bfs_stats
                         animation_solution = bfs_solution
@@ -146,9 +173,10 @@ def run_game(initial_state,
                         animation_timer = 0
                         ai_failed_to_solve = False
 
-                elif buttons["DFS"].collidepoint(event.pos):
+                elif buttons["DFS"].collidepoint(event.pos) and not pending("DFS"):
                     if dfs_solution is None:
                         ai_failed_to_solve = True
+                        failure_message = failure_text("DFS", dfs_stats)
                     else:
                         current_stats = dfs_stats
                         animation_solution = dfs_solution
@@ -169,7 +197,7 @@ def run_game(initial_state,
             pygame.draw.rect(screen, (30, 30, 30), (popup_x, popup_y, popup_w, popup_h))
             pygame.draw.rect(screen, (255, 255, 0), (popup_x, popup_y, popup_w, popup_h), 4)
 
-            warning_text = font.render("Can't be solved!", True, (255, 255, 0))
+            warning_text = font.render(failure_message, True, (255, 255, 0))
             instr_text = font.render("Press ESC to quit or M to return to menu", True, (255, 255, 255))
             screen.blit(warning_text, warning_text.get_rect(center=(SCREEN_WIDTH // 2, popup_y + 40)))
             screen.blit(instr_text, instr_text.get_rect(center=(SCREEN_WIDTH // 2, popup_y + 80)))